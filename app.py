@@ -12,6 +12,8 @@ from core.app_generator import AppHandler
 from core.generator import parse_app_spec
 from core.introspection import whereami
 from core.decorators import Uses
+from core.logs import AsyncLogging
+from core.metrics import Metrics
 from core.base import BaseApp
 
 class HelloWorld(object):
@@ -32,12 +34,17 @@ class Utility(object):
 class Empty(object):
     def runner(self):
         pass
-class Logger(object): pass
 class Proctitle(object):
+    def __init__(self):
+        self.app = None
     def install(self, app):
         print 'installing proctitle'
+        self.app = app
     def get_title(self):
-        return ''
+        metrics = getattr(getattr(self.app, 'components', None), 'metrics', None)
+        if metrics is None:
+            return ''
+        return metrics.summary()
 class SigTermStop(object):
     def install(self, app):
         print 'installing sigterm stop'
@@ -69,7 +76,8 @@ class App(BaseApp):
 
     class Components:
         cli = Cli
-        logging = Logger
+        logging = AsyncLogging
+        metrics = Metrics
         proctitle = Proctitle
         sigtermstop = SigTermStop
         backgroundtasks = BackGroundTasks
@@ -80,6 +88,7 @@ class App(BaseApp):
         get_parser = "components.cli.get_parser"
 
     class Install:
+        logging = "components.logging"
         genie = "genie"
         sigterm = "components.sigtermstop"
         proctitle = "components.proctitle"
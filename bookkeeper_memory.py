@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+"""
+    Measure how much memory bookkeepers use and how long their classes take to make
+
+    ./bookkeeper_memory.py --trees 20 --depth 30 --width 10
+
+    Makes trees hierarchies of app classes, each depth levels deep,
+    with width components and attrs declared on each level.
+    Then prints the deep size of every bookkeeper, counting shared objects once,
+    and how long it took to make the classes.
+
+    Use a large width (--trees 1 --depth 20 --width 400) to see how
+    making classes scales with the size of what's inherited.
+"""
+import argparse
+import logging
+import types
+import time
+import sys
+
+from core.app_generator import AppHandler
+from core.generator import parse_app_spec
+from core.base import BaseApp
+
+class Thing(object):
+    """Component for the generated classes"""
+
+# What the bookkeepers refer to but don't own
+not_owned = (type, types.ClassType, types.FunctionType, types.ModuleType, types.MethodType, property, logging.Logger)
+
+def deep_size(obj, seen):
+    """Return the size of obj and everything it refers to that isn't in seen"""
+    size = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, not_owned):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif not isinstance(obj, (basestring, int, long, float)):
+            if hasattr(obj, '__dict__'):
+                stack.append(obj.__dict__)
+            for kls in type(obj).__mro__:
+                for slot in kls.__dict__.get('__slots__', ()):
+                    if hasattr(obj, slot):
+                        stack.append(getattr(obj, slot))
+    return size
+
+def make_tree(depth, width):
+    """Return a list of classes, each a subclass of the one before"""
+    base = BaseApp
+    classes = []
+    for level in range(depth):
+        components = dict(("c{}_{}".format(level, i), Thing) for i in range(width))
+        components["shared"] = Thing
+        attrs = dict(("a{}_{}".format(level, i), i) for i in range(width))
+        body = {'__metaclass__': parse_app_spec(AppHandler), '__module__': __name__
+            , 'Components': types.ClassType("Components", (), components)
+            , 'Attrs': types.ClassType("Attrs", (), attrs)
+            }
+        base = parse_app_spec(AppHandler)("Level{}".format(level), (base, ), body)
+        classes.append(base)
+    return classes
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure how much memory bookkeepers use")
+    parser.add_argument("--trees", type=int, default=20, help="How many hierarchies to make")
+    parser.add_argument("--depth", type=int, default=30, help="How many levels in each hierarchy")
+    parser.add_argument("--width", type=int, default=10, help="How many components and attrs on each level")
+    args = parser.parse_args(argv)
+
+    start = time.time()
+    classes = []
+    for _ in range(args.trees):
+        classes.extend(make_tree(args.depth, args.width))
+    took = time.time() - start
+
+    seen = set()
+    total = sum(deep_size(kls.__dict__['__bookkeeper__'], seen) for kls in classes)
+    print "classes={} bookkeeper_bytes={} per_class={} creation={:.3f}s".format(len(classes), total, total // len(classes), took)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+"""
+    Check that making and throwing away app classes at runtime doesn't leak
+
+    ./churn.py --rounds 5 --classes 1000 --compiled --freeze
+
+    Each round makes classes with declare_subclass, as a reloader would,
+    bootstraps an instance of each and throws them all away.
+    After each round it prints how many of the classes are still alive,
+    how many loggers and linecache entries there are and the resident size.
+
+    The exit code is 1 if any classes survive or if the resident size
+    grew by more than --tolerance kilobytes after the first round
+"""
+import argparse
+import linecache
+import itertools
+import logging
+import weakref
+import sys
+import gc
+
+from core.app_generator import AppHandler
+from core.generator import parse_app_spec, declare_subclass
+from core.decorators import Memoized
+from core.base import BaseApp
+
+class Db(object):
+    def __init__(self):
+        self.table = {'a': 1}
+
+    def get(self, key):
+        return self.table[key]
+
+    def install(self, app):
+        self.installed = True
+
+class App(BaseApp):
+    __metaclass__ = parse_app_spec(AppHandler)
+
+    class Components:
+        db = Db
+
+    class Attrs:
+        tenant = None
+
+    class Methods:
+        get = "components.db.get"
+
+    class Install:
+        db = "components.db"
+
+def lookup(self, db, key):
+    return db.get(key)
+
+def churn(count, names, compiled=False, freeze=False):
+    """Make, bootstrap and use count classes and return weakrefs to them"""
+    refs = []
+    for number in range(count):
+        kls = declare_subclass(App, "Tenant{}".format(next(names))
+            , {"Components": {"db": Db, "other": number}, "Attrs": {"tenant": number}}
+            , lookup = Memoized("components.db")(lookup)
+            , compile_bootstrap = compiled
+            )
+
+        app = type(kls.__name__, (kls, ), {'__module__': kls.__module__})()
+        app.bootstrap()
+        app.lookup('a')
+        if freeze:
+            app.freeze().lookup('a')
+
+        refs.append(weakref.ref(kls))
+    return refs
+
+def rss():
+    """Return the resident size of this process in kilobytes"""
+    with open('/proc/self/statm') as fle:
+        return int(fle.read().split()[1]) * 4
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check that churning app classes doesn't leak")
+    parser.add_argument("--rounds", type=int, default=5, help="How many rounds of classes to make")
+    parser.add_argument("--classes", type=int, default=1000, help="How many classes to make each round")
+    parser.add_argument("--compiled", action="store_true", help="Use compile_bootstrap")
+    parser.add_argument("--freeze", action="store_true", help="Freeze each app as well")
+    parser.add_argument("--tolerance", type=int, default=1024, help="Kilobytes the resident size may grow by")
+    args = parser.parse_args(argv)
+
+    names = itertools.count()
+
+    # Warm up so caches and the allocator have settled
+    churn(args.classes // 5, names, args.compiled, args.freeze)
+    gc.collect()
+    start = None
+
+    failed = False
+    for number in range(args.rounds):
+        refs = churn(args.classes, names, args.compiled, args.freeze)
+        gc.collect()
+
+        alive = sum(1 for ref in refs if ref() is not None)
+        size = rss()
+        if start is None:
+            start = size
+
+        print "round={} alive={} loggers={} linecache={} rss_kb={}".format(
+            number, alive, len(logging.Logger.manager.loggerDict), len(linecache.cache), size
+            )
+        sys.stdout.flush()
+        if alive:
+            failed = True
+
+    if rss() - start > args.tolerance:
+        print "Resident size grew by {}kb".format(rss() - start)
+        failed = True
+
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,7 +2,13 @@ import collections
 import inspect
 
 from errors import RequirementError, RequirementAttributeError, DeveloperError, NotFound
-from introspection import find_obj, iterate_bookkeepers, position_for
+from introspection import find_obj, app_bookkeepers, position_for, PathTrie
+from compiled import compiled_bootstrap
+from hooks import Hooks, HookRequirementError, HookRequirementAttributeError, no_hooks
+from deferred import DeferredChecks
+from recorder import recorder
+from memory import measuring
+from freezer import Freezer
 
 class InstallRequirementError(RequirementError):
     path_desc = "installing"
@@ -17,22 +23,62 @@ class AppAdmin(object):
     def __init__(self, app):
         self.app = app
         self.app_kls = app.__class__
+        self.accountant = None
+        self.checkpoint = None
+        self.resolved = None
+        self.installed_any = False
+        self.deferred = []
 
     ########################
     ###   USAGE
     ########################
 
-    def bootstrap(self):
+    def bootstrap(self, accountant=None, checkpoint=None):
         """
             Make sure the app has a __bookkeeper__ property
             Then make sure everything is sane
             and install anything that must be installed
+
+            If the app class says compile_bootstrap then all of this is done
+            by a function generated for the class (see core.compiled)
+
+            If an accountant is provided (see core.memory) then it's used to record
+            memory used by each created thing and installer
+
+            If a checkpoint is provided (see core.checkpoint) then components
+            are restored from it where possible rather than created from scratch
+
+            If the app class says defer_checks then deferrable checkers
+            are left to run in the background once everything is installed
         """
         if not hasattr(self.app, '__bookkeeper__'):
             raise DeveloperError("The app being bootstrap'd needs to have a __bookkeeper__ property")
-        self.create_things()
-        self.sanity_check()
-        self.install()
+
+        if recorder.enabled:
+            recorder.record("bootstrap", self.app_kls.__name__)
+
+        self.accountant = accountant
+        self.checkpoint = checkpoint
+        if checkpoint is not None:
+            checkpoint.prepare(self.app_kls)
+
+        if accountant is None and checkpoint is None and getattr(self.app_kls, 'compile_bootstrap', False):
+            compiled_bootstrap(self.app_kls)(self.app)
+            return
+
+        try:
+            self.create_things()
+            self.sanity_check()
+            self.set_hooks()
+            self.install()
+        finally:
+            if accountant is not None:
+                accountant.stop()
+        self.start_deferred_checks(self.deferred)
+
+    def freeze(self):
+        """Return a frozen copy of the bootstrapped app (see core.freezer)"""
+        return Freezer(self.app).freeze()
 
     def sanity_check(self):
         """
@@ -42,22 +88,43 @@ class AppAdmin(object):
         app = self.app
 
         # Make sure any dynamically created things are sane on this instance
+        resolved = self.resolve_paths()
         for info in self.sanity_requirements:
-            app.__bookkeeper__.path_check(app, info)
+            app.__bookkeeper__.path_check(app, info, resolved=resolved)
 
         # And call any check functions we have
+        # Skipping pure checkers that our checker_cache knows have already passed
+        # And leaving deferrable ones for later if we're deferring checks
+        digest = None
+        self.deferred = []
+        cache = getattr(app, 'checker_cache', None)
+        defer = getattr(app, 'defer_checks', False)
         for attr in dir(app):
             if attr.startswith("check_"):
                 checker = getattr(app, attr)
                 if isinstance(checker, collections.Callable) and getattr(checker, '__checker__', True):
-                    checker()
+                    if recorder.enabled:
+                        recorder.record("check", attr)
+
+                    if defer and getattr(checker, '__deferrable__', False):
+                        self.deferred.append(attr)
+                    elif cache is not None and getattr(checker, '__pure__', False):
+                        if digest is None:
+                            digest = cache.digest(app)
+                        cache.run(digest, app, attr, checker)
+                    else:
+                        checker()
 
         # Make sure our methods point to callables
+        # Filling in delegates that haven't been looked up yet from the resolved paths
         found = []
-        for methods, _ in iterate_bookkeepers(self.app_kls, 'methods'):
-            for identity in methods:
+        for methods, _ in app_bookkeepers(self.app_kls, 'methods'):
+            for identity, delegate in methods.items():
                 if identity not in found:
                     found.append(identity)
+                    path = self.delegate_path(delegate)
+                    if path in resolved and not isinstance(resolved[path], NotFound):
+                        delegate.fset.__delegate_cache__.setdefault('val', resolved[path])
                     current = getattr(self.app, identity, None)
                     if not isinstance(current, collections.Callable):
                         raise self.app.__bookkeeper__.UnexpectedValueError(identity, self.app, "Expected to be a callable")
@@ -67,26 +134,92 @@ class AppAdmin(object):
         app = self.app
 
         for key, installer, origin in self.installers:
-            # Make sure the object exists
-            try:
+            if recorder.enabled:
+                recorder.record("install", key, installer)
+            obj = self.find_installer(key, installer, origin)
+            with measuring(self.accountant, "installer", key, obj):
+                self.installed_any = True
+                obj.install(app)
+
+    def start_deferred_checks(self, deferred):
+        """
+            Say the app is ready
+            And start running the deferred checkers in the background if there are any
+        """
+        app = self.app
+        app.ready = True
+        if recorder.enabled:
+            recorder.record("ready", self.app_kls.__name__, len(deferred))
+        if deferred:
+            checkers = [(attr, getattr(app, attr)) for attr in deferred]
+            on_failure = getattr(app, 'on_deferred_failure', "log")
+            cache = getattr(app, 'checker_cache', None)
+            app.deferred_checks = DeferredChecks(app, checkers, on_failure=on_failure, cache=cache).start()
+
+    def set_hooks(self):
+        """
+            Put the hooks from the Hooks declarations on the app as app.hooks
+            Apps without any keep the class's hooks, so they may use the name for something else
+        """
+        if not any(self.hook_paths):
+            return
+
+        current = getattr(self.app, 'hooks', no_hooks)
+        if not isinstance(current, Hooks):
+            raise DeveloperError("Apps that declare Hooks can't have anything else called hooks", app=self.app, found=current)
+        self.app.hooks = self.make_hooks()
+
+    def make_hooks(self):
+        """Find the hooks for each event in the Hooks declarations (see core.hooks)"""
+        app = self.app
+        table = {}
+        for event, paths, origin in self.hook_paths:
+            found = []
+            for path in paths:
+                try:
+                    hook = find_obj(app, path)
+                except NotFound as error:
+                    raise HookRequirementError(origin=origin, path=error.path, base=error.base, identity=event, found=error.found)
+
+                if not isinstance(hook, collections.Callable):
+                    raise HookRequirementAttributeError(origin=origin, path=path, obj=hook, identity=event, requires="__call__", found=path)
+                found.append(hook)
+            table[event] = tuple(found)
+
+        if recorder.enabled:
+            recorder.record("hooks", self.app_kls.__name__, len(table))
+        if not table:
+            return no_hooks
+        return Hooks(table)
+
+    def find_installer(self, key, installer, origin):
+        """Find the object at installer and complain if it can't be installed"""
+        app = self.app
+
+        # Make sure the object exists
+        # Using what was there when paths were resolved unless an earlier installer may have changed it
+        try:
+            resolved = self.resolved
+            if resolved is not None and not self.installed_any and installer in resolved and not isinstance(resolved[installer], NotFound):
+                obj = resolved[installer]
+            else:
                 obj = find_obj(app, installer)
-            except NotFound as error:
-                error_args = dict(origin=origin, path=error.path, base=error.base, identity=key, found=error.found)
-                error_args.update(self.app.__bookkeeper__.paper_trail(installer, app))
-                raise InstallRequirementError(**error_args)
+        except NotFound as error:
+            error_args = dict(origin=origin, path=error.path, base=error.base, identity=key, found=error.found)
+            error_args.update(self.app.__bookkeeper__.paper_trail(installer, app))
+            raise InstallRequirementError(**error_args)
 
-            # Make sure it has an install method
-            if not hasattr(obj, 'install'):
-                raise InstallRequirementAttributeError(origin=origin, path=installer, obj=obj, identity=key, requires="install")
+        # Make sure it has an install method
+        if not hasattr(obj, 'install'):
+            raise InstallRequirementAttributeError(origin=origin, path=installer, obj=obj, identity=key, requires="install")
 
-            # And finally, call the installer
-            obj.install(app)
+        return obj
 
     def create_things(self):
         """Get things from the bookkeeper that should be put onto the app"""
         created = []
-        for creator, _ in iterate_bookkeepers(self.app_kls, 'create_objects'):
-            for attribute, value in creator():
+        for creator, _ in app_bookkeepers(self.app_kls, 'create_objects'):
+            for attribute, value in creator(accountant=self.accountant, checkpoint=self.checkpoint, skip=created):
                 if attribute not in created:
                     created.append(attribute)
                     setattr(self.app, attribute, value)
@@ -95,6 +228,37 @@ class AppAdmin(object):
     ###   UTILITY
     ########################
 
+    def resolve_paths(self):
+        """
+            Resolve the paths for all the sanity requirements, delegates and installers in one go
+            So that shared prefixes are only looked up once for this instance
+
+            This happens before anything is installed, so once an installer has run
+            find_installer looks the rest up again in case it changed what's at their path
+        """
+        if self.resolved is None:
+            trie = PathTrie()
+            for paths, _, _ in self.sanity_requirements:
+                for path in paths:
+                    trie.add(path)
+
+            for methods, _ in app_bookkeepers(self.app_kls, 'methods'):
+                for delegate in methods.values():
+                    path = self.delegate_path(delegate)
+                    if path is not None:
+                        trie.add(path)
+
+            for _, installer, _ in self.installers:
+                trie.add(installer)
+
+            self.resolved = trie.resolve(self.app)
+        return self.resolved
+
+    def delegate_path(self, delegate):
+        """Return the path a Methods delegate looks up, or None if it isn't a delegate"""
+        if isinstance(delegate, property) and hasattr(delegate.fset, '__delegate_cache__'):
+            return getattr(delegate.fget, '__delegate_path__', None)
+
     @property
     def installers(self):
         """
@@ -103,7 +267,7 @@ class AppAdmin(object):
             for only the first occurance of each installer identity
         """
         installed = []
-        for installers, base in iterate_bookkeepers(self.app_kls, "installers"):
+        for installers, base in app_bookkeepers(self.app_kls, "installers"):
             if installers:
                 for key, installer in installers.items():
                     if key not in installed and not key.startswith("_"):
@@ -118,6 +282,22 @@ class AppAdmin(object):
                 if not installers.get('__extend__', True):
                     break 
 
+    @property
+    def hook_paths(self):
+        """
+            Get (event, paths, origin) for the hooks specified by each base in the app's mro
+            Using only the first occurance of each event
+        """
+        found = []
+        for hooks, base in app_bookkeepers(self.app_kls, "hooks"):
+            for event, paths in hooks.items():
+                if event not in found:
+                    found.append(event)
+                    if paths is not None:
+                        if isinstance(paths, basestring):
+                            paths = [paths]
+                        yield event, tuple(paths), getattr(base, "Hooks", base)
+
     @property
     def sanity_requirements(self):
         """
@@ -125,7 +305,7 @@ class AppAdmin(object):
             Making sure to only get the first requirement for each identity
         """
         found = []
-        for requirements, _ in iterate_bookkeepers(self.app_kls, "requirements"):
+        for requirements, _ in app_bookkeepers(self.app_kls, "requirements"):
             if requirements:
                 for paths, identity, origin in requirements:
                     if identity not in found:
@@ -6,6 +6,7 @@ from errors import DeveloperError, NotFound, RequirementError
 from decorators import not_extendable, not_nullable
 from introspection import position_for, find_obj
 from generator import SpecHandler
+from counters import counters
 
 class AppHandler(SpecHandler):
 
@@ -42,6 +43,13 @@ class AppHandler(SpecHandler):
             , bookkeeper_method="add_installers"
             )
 
+    @not_nullable
+    def make_hooks(self, name, spec, inherited, attrs):
+        """Determine what to call for each lifecycle event"""
+        self.add_to_bookkeeper(name, spec, inherited, attrs
+            , bookkeeper_method="add_hooks"
+            )
+
     @not_nullable
     def make_components(self, name, spec, inherited, attrs):
         """"Tell bookkeeper about components we want"""
@@ -58,6 +66,11 @@ class AppHandler(SpecHandler):
         cached = {}
         def getter(app):
             """Lazily get value and complain if it can't be found"""
+            if counters.enabled:
+                counters.incr("delegate.lookups")
+                if 'val' in cached:
+                    counters.incr("delegate.cache_hits")
+
             if 'val' not in cached:
                 try:
                     obj = find_obj(app, path)
@@ -72,5 +85,9 @@ class AppHandler(SpecHandler):
             """Force the cached value"""
             cached['val'] = val
 
+        # So AppAdmin can resolve the path along with everything else (see AppAdmin.resolve_paths)
+        getter.__delegate_path__ = path
+        setter.__delegate_cache__ = cached
+
         # Return our delegate as a property
         return property(getter, setter)
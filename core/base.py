@@ -1,16 +1,65 @@
 from bookkeeper import BookKeeper
 from admin import AppAdmin
+from hooks import no_hooks
 import logging
 
+class AppLogger(object):
+    """
+        Logger named after the app's class
+        Only made when it's used, as loggers live forever
+        and apps made at runtime would otherwise each leave one behind
+
+        Apps can still set their own log, which takes precedence
+    """
+    def __get__(self, app, kls):
+        if app is None:
+            return self
+        return logging.getLogger(kls.__name__)
+
 class BaseApp(object):
     admin_kls = AppAdmin
     bookkeeper_kls = BookKeeper
 
-    def __init__(self):
-        self.log = logging.getLogger(self.__class__.__name__)
+    # Bootstrap with a function generated for the class (see core.compiled)
+    compile_bootstrap = False
+
+    # Remember which pure checkers have passed (see core.checkcache)
+    checker_cache = None
+
+    # Run deferrable checkers in the background after install (see core.deferred)
+    # And what to do when one of them fails
+    defer_checks = False
+    on_deferred_failure = "log"
+
+    # Dispatch for the Hooks declarations (see core.hooks)
+    # Bootstrap only replaces this for apps that declare hooks
+    hooks = no_hooks
+
+    # Set when bootstrap has finished, and unset if a deferred checker says so
+    ready = False
+
+    # Logger named after the class, made when it's first used
+    log = AppLogger()
+
+    def __new__(kls, *args, **kwargs):
+        # Make sure lazily declared classes have been processed (see core.generator.LazySpec)
+        getattr(kls, '__bookkeeper__', None)
+        return super(BaseApp, kls).__new__(kls)
+
+    def bootstrap(self, **options):
+        """Bootstrap the app with our admin_kls, passing on any options"""
+        self.admin_kls(self).bootstrap(**options)
+
+    def freeze(self):
+        """
+            Return a copy of this bootstrapped app that can't be changed
+            And which has all it's delegates and @Uses methods resolved
+        """
+        return self.admin_kls(self).freeze()
 
-    def bootstrap(self):
-        self.admin_kls(self).bootstrap()
+    def framework_counters(self):
+        """Return a snapshot of the framework counters (see core.counters)"""
+        return self.__bookkeeper__.counters.snapshot()
 
     def execute(self):
         """Bootstrap the app and start running"""
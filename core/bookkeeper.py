@@ -5,30 +5,118 @@ import types
 
 from errors import RequirementError, NotFound, DeveloperError, UnexpectedValueError
 from introspection import find_obj, position_for, from_mro
+from counters import counters, timed
+from recorder import recorder
+from memory import measuring
+from profiling import profiled
+from layers import Layer, interned
+from shared import Shared
 
 class Unknown(object): pass
 
+def name_of(origin):
+    """Return a string naming an origin, so the recorder doesn't keep it alive"""
+    return str(getattr(origin, '__name__', origin))
+
+class Record(object):
+    """
+        A custom object or component recorded by the bookkeeper
+        Unpacks to ((name, kls, kwargs), origin)
+    """
+    __slots__ = ('name', 'kls', 'kwargs', 'origin')
+
+    def __init__(self, name, kls, kwargs, origin):
+        self.kls = kls
+        self.name = interned(name)
+        self.origin = origin
+        self.kwargs = kwargs or None
+
+    @property
+    def info(self):
+        kwargs = self.kwargs
+        if kwargs is None:
+            kwargs = {}
+        return self.name, self.kls, kwargs
+
+    def __iter__(self):
+        return iter((self.info, self.origin))
+
+    def __repr__(self):
+        return "<Record {!r}>".format((self.info, self.origin))
+
+class Inherited(dict):
+    """
+        Passed to BookKeeper.update as what's inherited to say it's everything the parent has
+        Which the bookkeeper shows from the parent's layer rather than being given it again
+
+        It's an empty dictionary for anything else that looks at it
+    """
+
 class BookKeeper(object):
     """
         Object for keeping track of what is defined on an app
+
+        The bookkeeper for a subclass shares whatever it inherits unchanged
+        with the bookkeeper of it's parent (see core.layers)
+
+        With share=True it starts with the parent's layers themselves
+        and only gets a layer of it's own for what it's updated with
     """
-    def __init__(self, name):
-        self.name = name
+    __slots__ = (
+          'name', 'parent'
+        , 'added', 'values', 'removed', 'replaced'
+        , 'attrs', 'custom', 'methods', 'checkers', 'components', 'installers', 'hooks', 'requirements'
+        )
 
-        self.added = {}
-        self.values = {}
-        self.removed = {}
-        self.replaced = {}
+    # Counters for the framework, see core.counters
+    counters = counters
 
-        self.attrs = {}
-        self.custom = {}
-        self.methods = {}
-        self.checkers = {}
-        self.components = {}
-        self.installers = {}
-        self.requirements = []
+    def __init__(self, name, parent=None, share=False):
+        self.name = name
+        self.parent = parent
+
+        self.added = Layer()
+        self.values = Layer()
+        self.removed = Layer()
+        self.replaced = Layer()
+
+        self.attrs = self.layer('attrs', share)
+        self.custom = self.layer('custom', share)
+        self.methods = self.layer('methods', share)
+        self.checkers = self.layer('checkers', share)
+        self.components = self.layer('components', share)
+        self.installers = self.layer('installers', share)
+        self.hooks = self.layer('hooks', share)
+        self.requirements = ()
+
+    @property
+    def log(self):
+        return logging.getLogger("{}:BookKeeper".format(self.name))
 
-        self.log = logging.getLogger("{}:BookKeeper".format(name))
+    def layer(self, key, share=False):
+        """
+            Return an empty Layer on top of the parent's values for this key
+            Or the parent's layer itself if we're sharing it
+        """
+        parent = getattr(self.parent, key, None)
+        if share and parent is not None:
+            return parent
+        return Layer(parent)
+
+    def shares(self, key):
+        """Say whether our layer for this key is our parent's"""
+        return self.parent is not None and getattr(self, key) is getattr(self.parent, key, None)
+
+    def inherits(self, key):
+        """Say whether any of our ancestors have values for this key"""
+        layer = getattr(self, key)
+        if not self.shares(key):
+            layer = layer.parent
+        while layer is not None:
+            if layer:
+                return True
+            layer = layer.parent
+        return False
 
     def value_for(self, identity, origin):
         """Attempt to guess a value for some attribute given it's origin"""
@@ -43,6 +131,15 @@ class BookKeeper(object):
         return values[identity]
 
     def debug(self, msg, **kwargs):
+        # Loggers are only made when debug is on, until then they have the root logger's level
+        name = "{}:BookKeeper".format(self.name)
+        if name not in logging.Logger.manager.loggerDict and not logging.getLogger().isEnabledFor(logging.DEBUG):
+            return
+
+        log = self.log
+        if not log.isEnabledFor(logging.DEBUG):
+            return
+
         origin = kwargs.get('origin')
         if 'origin' in kwargs:
             del kwargs['origin']
@@ -50,7 +147,7 @@ class BookKeeper(object):
 
         template = "\t".join("{}=%s".format(key) for key in sorted(kwargs.keys()))
         values = [msg, origin] + [v for _, v in sorted(kwargs.items())]
-        self.log.debug("%s\torigin=%s\t{}".format(template), *values)
+        log.debug("%s\torigin=%s\t{}".format(template), *values)
 
     def UnexpectedValueError(self, identity, app, msg=None):
         """Return an exception that can be raised to announce an unexpected value"""
@@ -72,28 +169,30 @@ class BookKeeper(object):
         keys = []
         for origin, attrs in self.added.items():
             keys.extend(attrs)
-        return attrs
+        return keys
 
     @property
     def removed_keys(self):
         keys = []
         for origin, attrs in self.removed.items():
             keys.extend(attrs)
-        return attrs
+        return keys
 
     @property
     def replaced_keys(self):
         keys = []
         for origin, attrs in self.replaced.items():
             keys.extend(attrs)
-        return attrs
+        return keys
 
+    @profiled("bookkeeper", lambda self, updating, *args, **kwargs: updating)
     def update(self, updating, attributes, inherited
         , extend=True, origin=None, prefix=None, everything_once_only=False, each_once_only=False, manually_update=False, store_with_origin=False):
         """Update one of the dictionaries"""
         if not attributes:
             return {}
 
+        inherit_everything = isinstance(inherited, Inherited)
         if not inherited:
             inherited = {}
 
@@ -107,6 +206,11 @@ class BookKeeper(object):
         self.debug("Adding {}".format(updating), **debug_kwargs)
 
         values = getattr(self, updating)
+        if self.shares(updating):
+            # Get our own layer now we have something of our own
+            values = Layer(values)
+            setattr(self, updating, values)
+
         if everything_once_only and values:
             raise DevelopeError("Adding '{}', but already have some".format(updating), origin=origin)
 
@@ -114,6 +218,9 @@ class BookKeeper(object):
             inherited = {"{}.{}".format(prefix, key):val for key, val in inherited.items()}
             attributes = {"{}.{}".format(prefix, key):val for key, val in attributes.items()}
 
+        inherited = {interned(key):val for key, val in inherited.items()}
+        attributes = {interned(key):val for key, val in attributes.items()}
+
         if each_once_only:
             for key in attributes:
                 if key in values:
@@ -128,6 +235,9 @@ class BookKeeper(object):
         if conflict:
             raise DeveloperError("Adding same variables ({}) to '{}' even though this bookkeeper has already added that".format(list(conflict), updating), origin=origin)
 
+        if inherit_everything and extend:
+            values.show_everything()
+
         self.added_attributes(added, origin)
         self.removed_attributes(removed, origin)
 
@@ -139,7 +249,7 @@ class BookKeeper(object):
 
         if not manually_update:
             if store_with_origin:
-                values.update({key:(val, origin) for key, val in adding.items()})
+                values.update({key:Record(val[0], val[1], val[2], origin) for key, val in adding.items()})
             else:
                 values.update(adding)
         return adding
@@ -156,7 +266,9 @@ class BookKeeper(object):
         if isinstance(paths, basestring):
             paths = [paths]
 
-        self.debug("Adding requirements", identity=identity, paths=paths)
+        self.debug("Adding requirements", identity=identity, paths=paths, origin=origin)
+        if not self.requirements:
+            self.requirements = []
         self.requirements.append((paths, identity, origin))
 
     def add_attrs(self, attrs, inherited, extend=True, origin=None):
@@ -175,6 +287,10 @@ class BookKeeper(object):
         """Record things that require to be installed"""
         self.update('installers', installers, inherited, extend=extend, origin=origin, everything_once_only=True)
 
+    def add_hooks(self, hooks, inherited, extend=True, origin=None):
+        """Record paths to call for lifecycle events"""
+        self.update('hooks', hooks, inherited, extend=extend, origin=origin)
+
     def add_custom(self, attributes, inherited, extend=True, origin=None):
         """Record a custom object"""
         self.update('custom', attributes, inherited, extend=extend, origin=origin, each_once_only=True, store_with_origin=True)
@@ -182,46 +298,55 @@ class BookKeeper(object):
     def add_components(self, components, inherited, extend=True, origin=None):
         """Record components"""
         adding = self.update("components", components, inherited, extend=extend, origin=origin, prefix="components", manually_update=True)
+        parent = self.components.parent
         for identity, kls in adding.items():
             name = identity[len("components."):]
-            self.components[identity] = ((name, kls, {}), origin)
+
+            # Share the parent's record for components we inherit as is
+            record = None
+            if parent is not None and name not in components:
+                record = parent.get(identity)
+
+            if record is None or record.kls is not kls:
+                record = Record(name, kls, None, origin)
+            self.components[identity] = record
 
     def added_attributes(self, attributes, origin):
         """Record added attributes"""
         if not attributes:
             return
 
+        if recorder.enabled:
+            recorder.record("added", self.name, name_of(origin), tuple(attributes))
         self.debug("Adding attrs", attributes=attributes, origin=origin)
-        if origin not in self.added:
-            self.added[origin] = []
 
-        conflicts = set(self.added[origin]) - set(attributes)
+        conflicts = set(self.added.get(origin, ())) - set(attributes)
         if conflicts:
             raise DevelopeError("Adding variable already added by the metaclass somewhere", origin=origin)
 
-        self.added[origin].extend(attributes)
+        self.added[origin] = self.added.get(origin, ()) + tuple(attributes)
 
     def removed_attributes(self, attributes, origin):
         """Record removed attributes"""
         if not attributes:
             return
 
+        if recorder.enabled:
+            recorder.record("removed", self.name, name_of(origin), tuple(attributes))
         self.debug("Removing attrs", attributes=attributes, origin=origin)
-        if origin not in self.removed:
-            self.removed[origin] = []
 
-        self.removed[origin].extend(attributes)
+        self.removed[origin] = self.removed.get(origin, ()) + tuple(attributes)
 
     def replaced_attributes(self, attributes, origin):
         """Record replaced attrs"""
         if not attributes:
             return
 
+        if recorder.enabled:
+            recorder.record("replaced", self.name, name_of(origin), tuple(attributes))
         self.debug("Replacing attrs", attributes=attributes, origin=origin)
-        if origin not in self.replaced:
-            self.replaced[origin] = []
 
-        self.replaced[origin].extend(attributes)
+        self.replaced[origin] = self.replaced.get(origin, ()) + tuple(attributes)
 
     def normalise_attr_record(self):
         """Remove spurious added attrs that are actually removed or replaced"""
@@ -236,41 +361,102 @@ class BookKeeper(object):
                     not_added.append(attr)
 
             if not_added:
-                self.added[origin] = [key for key in self.added[origin] if key not in not_added]
+                self.added[origin] = tuple(key for key in self.added[origin] if key not in not_added)
 
-    def path_check(self, app, info):
+    def path_check(self, app, info, resolved=None):
         """
             Make sure that the app has all the paths specified by paths
             Use identity and origin in the error message if path couldn't ve found
+
+            resolved is an optional {path: obj or NotFound} from introspection.PathTrie
         """
         paths, identity, origin = info
         for path in paths:
             try:
-                find_obj(app, path)
+                if resolved is not None and path in resolved:
+                    if isinstance(resolved[path], NotFound):
+                        raise resolved[path]
+                else:
+                    find_obj(app, path)
             except NotFound as error:
                 raise RequirementError(origin=origin, path=error.path, base=error.base, identity=identity, found=error.found)
 
-    def create_objects(self):
-        """Yield (attribute, value) for things that should be created"""
-        for identity, (info, origin) in self.custom.items():
-            yield identity, self.generate_thing(info, origin)
+    def create_objects(self, accountant=None, checkpoint=None, skip=()):
+        """
+            Yield (attribute, value) for things that should be created
+            Recording memory used by each thing with accountant if we have one
+            And restoring components from checkpoint if we have one
+
+            Attributes in skip aren't made, as a bookkeeper earlier in the mro already made them
+            And anything in layers we share with our parent is left to our parent's bookkeeper
+        """
+        for identity, (info, origin) in self.own_items('custom'):
+            if identity in skip:
+                continue
+
+            if recorder.enabled:
+                recorder.record("create", self.name, identity)
+            with measuring(accountant, "custom", identity) as measured:
+                thing = self.generate_thing(info, origin)
+                measured.made(thing)
+            yield identity, thing
 
         component_objs = {}
-        for identity, (info, origin) in self.components.items():
+        components = ()
+        if 'components' not in skip:
+            components = self.own_items('components')
+
+        for identity, (info, origin) in components:
             name, kls, kwargs = info
+            if recorder.enabled:
+                recorder.record("create", self.name, identity)
+
             if type(kls) is type:
-                component_objs[name] = self.generate_thing(info, origin)
+                restored = False
+                if checkpoint is not None:
+                    restored, obj = checkpoint.restore(identity, kls)
+
+                with measuring(accountant, "component", identity) as measured:
+                    if restored:
+                        component_objs[name] = obj
+                    else:
+                        component_objs[name] = self.generate_thing(info, origin)
+                    measured.made(component_objs[name])
             else:
                 component_objs[name] = kls
-        yield 'components', type("components", (object, ), component_objs)()
 
-        for identity, val in self.attrs.items():
-            if isinstance(val, types.LambdaType) and val.__name__ == '<lambda>':
-                val = val()
+        # Leave components to our parents if we don't have any but they do
+        if 'components' not in skip and (component_objs or not self.inherits('components')):
+            yield 'components', type("components", (object, ), component_objs)()
+
+        for identity, val in self.own_items('attrs'):
+            if identity in skip:
+                continue
+
+            if isinstance(val, Shared):
+                with measuring(accountant, "attr", identity) as measured:
+                    val = val.attach()
+                    measured.made(val)
+            elif isinstance(val, types.LambdaType) and val.__name__ == '<lambda>':
+                with measuring(accountant, "attr", identity) as measured:
+                    val = val()
+                    measured.made(val)
             yield identity, val
 
+    def own_items(self, key):
+        """Return the items in our layer for this key, or nothing if it's our parent's"""
+        if self.shares(key):
+            return ()
+        return getattr(self, key).items()
+
     def generate_thing(self, info, origin):
         """Create an object from a single spec"""
+        if counters.enabled:
+            with timed(counters, "generate_thing"):
+                return self._generate_thing(info, origin)
+        return self._generate_thing(info, origin)
+
+    def _generate_thing(self, info, origin):
         name, kls, kwargs = info
         if not kls:
             raise DeveloperError("Component {} needs to have a __main__ variable".format(name), origin=origin)
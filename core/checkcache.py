@@ -0,0 +1,152 @@
+import threading
+import hashlib
+import cPickle
+import types
+import os
+
+from introspection import bookkeepers_for
+
+class CheckerCache(object):
+    """
+        Remember which pure checkers have passed for a spec and set of Attrs
+
+        Checkers marked with core.decorators.pure_checker say they only depend on
+        the app class and the values of it's Attrs, so once they pass there is
+        no need to run them again until either of those change
+
+        Passes are remembered in memory, and in the file at path if one is given
+    """
+    def __init__(self, path=None):
+        self.path = path
+        self.lock = threading.Lock()
+        self.passed = None
+
+    ########################
+    ###   USAGE
+    ########################
+
+    def run(self, digest, app, attr, checker):
+        """Call the checker unless it has already passed for this digest"""
+        fingerprint = self.fingerprint(digest, attr, checker)
+        if fingerprint is None:
+            # We can't tell when this checker changes, so it always runs
+            checker()
+            return
+
+        if fingerprint in self.passes():
+            return
+
+        checker()
+        self.record(fingerprint)
+
+    def digest(self, app):
+        """Return a digest of the app's spec and the values of it's Attrs"""
+        app_kls = app.__class__
+        hasher = hashlib.sha1()
+        hasher.update("{}.{}".format(app_kls.__module__, app_kls.__name__))
+
+        names = set()
+        for attrs, base in bookkeepers_for(app_kls, 'attrs'):
+            names.update(attrs)
+
+        for components, base in bookkeepers_for(app_kls, 'components'):
+            for identity, ((name, kls, _), _) in sorted(components.items()):
+                hasher.update("{}={}".format(identity, self.describe(kls)))
+
+        for methods, base in bookkeepers_for(app_kls, 'methods'):
+            hasher.update(repr(sorted(methods)))
+
+        for name in sorted(names):
+            hasher.update(name)
+            hasher.update(self.serialise(getattr(app, name, None)))
+
+        return hasher.hexdigest()
+
+    def fingerprint(self, digest, attr, checker):
+        """
+            Return a fingerprint for this checker against this digest
+
+            Covers where the checker is defined, it's code, including the names it uses,
+            it's default arguments and what it has closed over.
+            Returns None for checkers that aren't plain functions or methods
+        """
+        func = getattr(checker, "im_func", checker)
+        if not isinstance(func, types.FunctionType):
+            return None
+
+        hasher = hashlib.sha1(digest)
+        hasher.update(attr)
+
+        owner = getattr(checker, "im_class", None)
+        if owner is not None:
+            hasher.update(self.describe(owner))
+        hasher.update("{}.{}".format(func.__module__, func.__name__))
+
+        self.hash_code(hasher, func.func_code)
+        hasher.update(self.serialise(func.func_defaults))
+        for cell in func.func_closure or ():
+            try:
+                hasher.update(self.serialise(cell.cell_contents))
+            except ValueError:
+                # Cell hasn't been filled in yet
+                hasher.update("<empty cell>")
+        return hasher.hexdigest()
+
+    def hash_code(self, hasher, code):
+        """Add a code object, and any code objects nested in it, to hasher"""
+        hasher.update(code.co_code)
+        hasher.update(repr((code.co_names, code.co_varnames, code.co_freevars, code.co_cellvars)))
+        for const in code.co_consts:
+            if isinstance(const, types.CodeType):
+                self.hash_code(hasher, const)
+            else:
+                hasher.update(repr(const))
+
+    def forget(self):
+        """Forget everything that has passed, including what's in our file"""
+        with self.lock:
+            self.passed = set()
+            if self.path and os.path.exists(self.path):
+                os.remove(self.path)
+
+    ########################
+    ###   STORAGE
+    ########################
+
+    def passes(self):
+        """Return the fingerprints that have passed, loading them from our file the first time"""
+        if self.passed is None:
+            with self.lock:
+                if self.passed is None:
+                    passed = set()
+                    if self.path and os.path.exists(self.path):
+                        with open(self.path) as fle:
+                            passed.update(line.strip() for line in fle if line.strip())
+                    self.passed = passed
+        return self.passed
+
+    def record(self, fingerprint):
+        """Remember that this fingerprint passed"""
+        passed = self.passes()
+        with self.lock:
+            passed.add(fingerprint)
+            if self.path:
+                with open(self.path, 'a') as fle:
+                    fle.write("{}\n".format(fingerprint))
+
+    ########################
+    ###   UTILITY
+    ########################
+
+    def describe(self, thing):
+        """Return a string for a class, or a repr for anything else"""
+        if hasattr(thing, '__module__') and hasattr(thing, '__name__'):
+            return "{}.{}".format(thing.__module__, thing.__name__)
+        return repr(thing)
+
+    def serialise(self, val):
+        """Return a string that changes when val changes"""
+        try:
+            return cPickle.dumps(val, 2)
+        except Exception:
+            return repr(val)
@@ -0,0 +1,145 @@
+import logging
+import cPickle
+import hashlib
+import mmap
+import os
+
+from introspection import bookkeepers_for
+
+log = logging.getLogger("Checkpoint")
+
+def describe(kls):
+    """Return module.name for a class"""
+    return "{}.{}".format(kls.__module__, kls.__name__)
+
+def describe_component(thing):
+    """
+        Return a description of a component that is the same in every process
+        So classes and functions are module.name, plain values are their repr
+        And any other object is described by it's class, as it's repr may have an address in it
+    """
+    if hasattr(thing, '__module__') and hasattr(thing, '__name__'):
+        return describe(thing)
+    if thing is None or isinstance(thing, (basestring, bool, int, long, float)):
+        return repr(thing)
+    return "instance of {}".format(describe(type(thing)))
+
+def can_checkpoint(kls):
+    """Say whether instances of this class can be snapshotted and restored"""
+    return hasattr(kls, 'snapshot') and hasattr(kls, 'restore')
+
+class Checkpoint(object):
+    """
+        Save the state of an app's components to a file and restore them from it
+
+        Components opt in by having a snapshot method that returns picklable state
+        And a restore classmethod that makes an instance from that state.
+        They may also have a checkpoint_version that is changed when their state changes shape.
+
+        checkpoint = Checkpoint("/var/lib/myapp/checkpoint")
+        app.bootstrap(checkpoint=checkpoint)
+        ...
+        checkpoint.save(app)
+
+        Components are only restored if the checkpoint was made for the same app spec
+        and the component's class and version haven't changed
+        Otherwise they are created as normal, as are any that fail to restore
+    """
+    magic = "app-play-checkpoint 1\n"
+
+    def __init__(self, path, mmap_threshold=16 * 1024 * 1024):
+        self.path = path
+        self.mmap_threshold = mmap_threshold
+        self.entries = {}
+
+    ########################
+    ###   USAGE
+    ########################
+
+    def save(self, app):
+        """Write snapshots of the app's components to our file"""
+        entries = {}
+        for identity, component in self.components_on(app):
+            kls = component.__class__
+            if can_checkpoint(kls):
+                entries[identity] = dict(kls=describe(kls), version=self.version_for(kls), state=component.snapshot())
+
+        checkpoint = dict(spec=self.spec_for(app.__class__), entries=entries)
+        tmp = "{}.{}.tmp".format(self.path, os.getpid())
+        with open(tmp, 'wb') as fle:
+            fle.write(self.magic)
+            cPickle.dump(checkpoint, fle, cPickle.HIGHEST_PROTOCOL)
+        os.rename(tmp, self.path)
+
+    def prepare(self, app_kls):
+        """
+            Load the checkpoint for this app class
+            Ignoring it if it doesn't exist, isn't a checkpoint or was for a different spec
+        """
+        self.entries = {}
+        checkpoint = self.load()
+        if checkpoint and checkpoint.get('spec') == self.spec_for(app_kls):
+            self.entries = checkpoint.get('entries', {})
+
+    def restore(self, identity, kls):
+        """Return (True, obj) if we can restore this component, otherwise (False, None)"""
+        entry = self.entries.get(identity)
+        if entry is None or not can_checkpoint(kls):
+            return False, None
+
+        if entry['kls'] != describe(kls) or entry['version'] != self.version_for(kls):
+            return False, None
+
+        try:
+            return True, kls.restore(entry['state'])
+        except Exception as error:
+            # The component is created as normal instead
+            log.error("Failed to restore component from checkpoint\tidentity=%s\tkls=%s\tpath=%s\terror=%s", identity, describe(kls), self.path, error)
+            return False, None
+
+    ########################
+    ###   UTILITY
+    ########################
+
+    def load(self):
+        """Return what's in our file, memory mapping it if it's big"""
+        if not os.path.exists(self.path):
+            return None
+
+        with open(self.path, 'rb') as fle:
+            if fle.read(len(self.magic)) != self.magic:
+                return None
+
+            size = os.fstat(fle.fileno()).st_size
+            try:
+                if size < self.mmap_threshold:
+                    return cPickle.load(fle)
+
+                mapped = mmap.mmap(fle.fileno(), 0, access=mmap.ACCESS_READ)
+                try:
+                    mapped.seek(len(self.magic))
+                    return cPickle.load(mapped)
+                finally:
+                    mapped.close()
+            except Exception:
+                # A corrupt or out of date checkpoint just means nothing is restored
+                return None
+
+    def components_on(self, app):
+        """Yield (identity, component) for the components on the app"""
+        components = app.components
+        for name in dir(components):
+            if not name.startswith("_"):
+                yield "components.{}".format(name), getattr(components, name)
+
+    def spec_for(self, app_kls):
+        """Return a digest of the components an app class declares"""
+        hasher = hashlib.sha1(describe(app_kls))
+        for components, _ in bookkeepers_for(app_kls, 'components'):
+            for identity, ((name, kls, _), _) in sorted(components.items()):
+                hasher.update("{}={}".format(identity, describe_component(kls)))
+        return hasher.hexdigest()
+
+    def version_for(self, kls):
+        """Return the checkpoint version of a component class"""
+        return getattr(kls, 'checkpoint_version', 1)
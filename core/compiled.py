@@ -0,0 +1,259 @@
+import collections
+import linecache
+import weakref
+import types
+import re
+
+from introspection import app_bookkeepers
+from recorder import recorder
+from shared import Shared
+
+# Paths made of these can be written as plain attribute access
+identifier = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# {filename: weakref to the app class} for source we've put in linecache
+# So the source is removed when the class goes away
+sources = {}
+
+def remember_source(app_kls, filename, source):
+    """Make the source available to tracebacks and debuggers for as long as the class exists"""
+    def forget(ref):
+        if sources.get(filename) is ref:
+            del sources[filename]
+            linecache.cache.pop(filename, None)
+
+    sources[filename] = weakref.ref(app_kls, forget)
+    linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
+
+def compiled_bootstrap(app_kls):
+    """
+        Return the compiled bootstrap function for this app class
+        Compiling it the first time it's asked for
+    """
+    if '__compiled_bootstrap__' not in app_kls.__dict__:
+        compiler = BootstrapCompiler(app_kls)
+        setattr(app_kls, '__compiled_bootstrap__', staticmethod(compiler.compile()))
+    return app_kls.__dict__['__compiled_bootstrap__'].__get__(None, app_kls)
+
+class BootstrapCompiler(object):
+    """
+        Turn what AppAdmin.bootstrap would do for an app class into a single function
+
+        The function creates things, checks them and calls installers
+        With each step written out in order with constant paths
+        Anything that goes wrong falls back to the interpreted code to make the error
+    """
+    def __init__(self, app_kls):
+        self.app_kls = app_kls
+        self.admin = app_kls.admin_kls.__new__(app_kls.admin_kls)
+        self.admin.app_kls = app_kls
+
+        self.lines = []
+        self.constants = {}
+
+    ########################
+    ###   USAGE
+    ########################
+
+    def compile(self):
+        """Return a function that bootstraps an instance of our app class"""
+        self.lines = ["def bootstrap(app):"]
+        self.constants = {'Callable': collections.Callable, 'recorder': recorder}
+        self.emit(self.recording("bootstrap", self.app_kls.__name__))
+
+        created = self.create_things()
+        self.sanity_check(created)
+        self.hooks()
+        self.install()
+        if getattr(self.app_kls, 'defer_checks', False):
+            self.emit("{}(app).start_deferred_checks(deferred)".format(self.constant(self.app_kls.admin_kls)))
+        else:
+            self.emit("app.ready = True")
+            self.emit(self.recording("ready", self.app_kls.__name__, 0))
+        self.emit("return app")
+
+        source = "{}\n".format("\n".join(self.lines))
+        filename = "<compiled bootstrap for {}.{}>".format(self.app_kls.__module__, self.app_kls.__name__)
+        namespace = dict(self.constants)
+        exec compile(source, filename, "exec") in namespace
+
+        remember_source(self.app_kls, filename, source)
+
+        bootstrap = namespace["bootstrap"]
+        bootstrap.__source__ = source
+        return bootstrap
+
+    ########################
+    ###   STEPS
+    ########################
+
+    def create_things(self):
+        """
+            Write out AppAdmin.create_things
+            This mirrors the order BookKeeper.create_objects yields things in
+        """
+        created = []
+        def add(attribute):
+            if attribute in created:
+                return False
+            created.append(attribute)
+            return True
+
+        for bookkeeper, _ in app_bookkeepers(self.app_kls):
+            generate_thing = self.constant(bookkeeper.generate_thing)
+
+            for identity, (info, origin) in bookkeeper.custom.items():
+                if add(identity):
+                    self.emit(self.recording("create", bookkeeper.name, identity))
+                    self.emit_setattr(identity, "{}({}, {})".format(generate_thing, self.constant(info), self.constant(origin)))
+
+            # Leave components to the parents if this bookkeeper has none but they do
+            if (bookkeeper.components or not bookkeeper.inherits('components')) and add('components'):
+                for identity in bookkeeper.components:
+                    self.emit(self.recording("create", bookkeeper.name, identity))
+                self.emit("app.components = type('components', (object, ), {")
+                for identity, (info, origin) in bookkeeper.components.items():
+                    name, kls, kwargs = info
+                    if type(kls) is type:
+                        self.emit("    {!r}: {}({}, {}),".format(name, generate_thing, self.constant(info), self.constant(origin)))
+                    else:
+                        self.emit("    {!r}: {},".format(name, self.constant(kls)))
+                self.emit("    })()")
+
+            for identity, val in bookkeeper.attrs.items():
+                if add(identity):
+                    if isinstance(val, Shared):
+                        self.emit_setattr(identity, "{}.attach()".format(self.constant(val)))
+                    elif isinstance(val, types.LambdaType) and val.__name__ == '<lambda>':
+                        self.emit_setattr(identity, "{}()".format(self.constant(val)))
+                    else:
+                        self.emit_setattr(identity, self.constant(val))
+
+        return created
+
+    def sanity_check(self, created):
+        """Write out AppAdmin.sanity_check"""
+        bookkeeper = self.app_kls.__bookkeeper__
+        for info in self.admin.sanity_requirements:
+            paths, identity, origin = info
+            path_check = self.constant(bookkeeper.path_check)
+            for path in paths:
+                self.emit_lookup(path, "{}(app, {})".format(path_check, self.constant(info)))
+
+        # Checkers that are methods on the class can be called straight away
+        # Anything else gets the same runtime check as the interpreter
+        # Pure checkers go through the checker_cache if the class has one
+        # Deferrable checkers are collected in deferred if the class defers checks
+        defer = getattr(self.app_kls, 'defer_checks', False)
+        if defer:
+            self.emit("deferred = []")
+        cache = getattr(self.app_kls, 'checker_cache', None)
+        if cache is not None:
+            cache = self.constant(cache)
+            self.emit("digest = None")
+
+        checkers = set(created) | set(dir(self.app_kls))
+        for attr in sorted(checkers):
+            if not attr.startswith("check_"):
+                continue
+
+            checker = getattr(self.app_kls, attr, None)
+            if attr not in created and isinstance(checker, types.MethodType):
+                if getattr(checker, '__checker__', True):
+                    self.emit(self.recording("check", attr))
+                    if defer and getattr(checker, '__deferrable__', False):
+                        self.emit("deferred.append({!r})".format(attr))
+                    elif cache is not None and getattr(checker, '__pure__', False):
+                        self.emit("if digest is None:")
+                        self.emit("    digest = {}.digest(app)".format(cache))
+                        self.emit("{}.run(digest, app, {!r}, app.{})".format(cache, attr, attr))
+                    else:
+                        self.emit("app.{}()".format(attr))
+            else:
+                self.emit("checker = getattr(app, {!r})".format(attr))
+                self.emit("if isinstance(checker, Callable) and getattr(checker, '__checker__', True):")
+                self.emit("    {}".format(self.recording("check", attr)))
+                branches = []
+                if defer:
+                    branches.append(("getattr(checker, '__deferrable__', False)", ["deferred.append({!r})".format(attr)]))
+                if cache is not None:
+                    branches.append(("getattr(checker, '__pure__', False)"
+                        , ["if digest is None:", "    digest = {}.digest(app)".format(cache), "{}.run(digest, app, {!r}, checker)".format(cache, attr)]
+                        ))
+
+                if not branches:
+                    self.emit("    checker()")
+                else:
+                    for index, (condition, body) in enumerate(branches):
+                        self.emit("    {} {}:".format("elif" if index else "if", condition))
+                        for line in body:
+                            self.emit("        {}".format(line))
+                    self.emit("    else:")
+                    self.emit("        checker()")
+
+        found = []
+        unexpected = self.constant(bookkeeper.UnexpectedValueError)
+        for methods, _ in app_bookkeepers(self.app_kls, 'methods'):
+            for identity in methods:
+                if identity not in found:
+                    found.append(identity)
+                    self.emit("if not isinstance(getattr(app, {!r}, None), Callable):".format(identity))
+                    self.emit("    raise {}({!r}, app, 'Expected to be a callable')".format(unexpected, identity))
+
+    def hooks(self):
+        """Write out AppAdmin.set_hooks, which does nothing for apps without hooks"""
+        if any(self.admin.hook_paths):
+            self.emit("{}(app).set_hooks()".format(self.constant(self.app_kls.admin_kls)))
+
+    def install(self):
+        """Write out AppAdmin.install"""
+        admin_kls = self.constant(self.app_kls.admin_kls)
+        for key, installer, origin in self.admin.installers:
+            fallback = "{}(app).find_installer({!r}, {!r}, {})".format(admin_kls, key, installer, self.constant(origin))
+            self.emit(self.recording("install", key, installer))
+            self.emit_lookup(installer, fallback, assign="obj")
+            self.emit("if not hasattr(obj, 'install'):")
+            self.emit("    obj = {}".format(fallback))
+            self.emit("obj.install(app)")
+
+    ########################
+    ###   UTILITY
+    ########################
+
+    def emit(self, line):
+        """Add a line to the body of the function"""
+        self.lines.append("    {}".format(line))
+
+    def recording(self, event, *details):
+        """Return a line that records an event with the flight recorder (see core.recorder)"""
+        return "if recorder.enabled: recorder.record({})".format(", ".join(repr(part) for part in (event, ) + details))
+
+    def emit_setattr(self, attribute, value):
+        """Write out setting attribute on the app to value"""
+        if identifier.match(attribute):
+            self.emit("app.{} = {}".format(attribute, value))
+        else:
+            self.emit("setattr(app, {!r}, {})".format(attribute, value))
+
+    def emit_lookup(self, path, fallback, assign=None):
+        """
+            Write out looking up path on the app
+            Using fallback to get it (or complain about it) if the lookup fails
+        """
+        target = ""
+        if assign:
+            target = "{} = ".format(assign)
+
+        if all(identifier.match(part) for part in path.split(".")):
+            self.emit("try:")
+            self.emit("    {}app.{}".format(target, path))
+            self.emit("except Exception:")
+            self.emit("    {}{}".format(target, fallback))
+        else:
+            self.emit("{}{}".format(target, fallback))
+
+    def constant(self, value):
+        """Make value available to the generated function and return the name to use for it"""
+        name = "_{}".format(len(self.constants))
+        self.constants[name] = value
+        return name
@@ -0,0 +1,67 @@
+import threading
+import time
+
+class Counters(object):
+    """
+        Counts how often bits of the framework get used
+
+        Counting is off until enable is called
+        Callers should check enabled before calling incr or timing
+        So that a disabled Counters costs a single attribute lookup
+    """
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.counts = {}
+        self.durations = {}
+
+    def enable(self):
+        """Start counting"""
+        self.enabled = True
+
+    def disable(self):
+        """Stop counting, but keep what has been counted so far"""
+        self.enabled = False
+
+    def reset(self):
+        """Forget everything that has been counted"""
+        with self.lock:
+            self.counts = {}
+            self.durations = {}
+
+    def incr(self, name, amount=1):
+        """Add amount to the count for name"""
+        with self.lock:
+            self.counts[name] = self.counts.get(name, 0) + amount
+
+    def timing(self, name, duration):
+        """Record a duration in seconds for name"""
+        with self.lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+            self.durations[name] = self.durations.get(name, 0) + duration
+
+    def snapshot(self):
+        """
+            Return a dictionary of everything counted so far
+            Timed names also get <name>.seconds with their total duration
+        """
+        with self.lock:
+            snapshot = dict(self.counts)
+            for name, duration in self.durations.items():
+                snapshot["{}.seconds".format(name)] = duration
+        return snapshot
+
+class timed(object):
+    """Context manager that records how long the block took against name in counters"""
+    def __init__(self, counters, name):
+        self.name = name
+        self.counters = counters
+
+    def __enter__(self):
+        self.start = time.time()
+
+    def __exit__(self, typ, value, tb):
+        self.counters.timing(self.name, time.time() - self.start)
+
+# The counters used by the framework
+counters = Counters()
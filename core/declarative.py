@@ -0,0 +1,53 @@
+from generator import process_spec
+from app_generator import AppHandler
+from base import BaseApp
+
+class AppSpecMeta(type):
+    """
+        Metaclass that processes the declarations of every subclass with it's spec_handler
+
+        Unlike parse_app_spec(handler) this is inherited, so subclasses don't need to say
+        __metaclass__ themselves, and the handler is found from the spec_handler attribute.
+
+        Only the declarations in a class's own body are processed.
+        Every class gets it's own bookkeeper, which shares the resolved layers of it's parent's
+        for anything it doesn't declare, and builds on top of them for what it does
+        rather than finding what it inherits from the declarations of it's bases again.
+
+        Declaration blocks are old style classes or subclasses of core.generator.Declaration
+
+        Instances are bootstrapped with the bookkeeper of their own class as well as those of it's parents
+        So unlike parse_app_spec classes, these don't need a plain subclass to be instantiated
+    """
+    # Read by core.introspection.app_bookkeepers
+    bootstraps_own_bookkeeper = True
+
+    def __new__(meta, name, bases, attrs):
+        handler = attrs.get('spec_handler')
+        if handler is None:
+            for base in bases:
+                handler = getattr(base, 'spec_handler', None)
+                if handler is not None:
+                    break
+
+        if handler is None:
+            return super(AppSpecMeta, meta).__new__(meta, name, bases, attrs)
+
+        def make(name, bases, attrs):
+            return super(AppSpecMeta, meta).__new__(meta, name, bases, attrs)
+        return process_spec(handler, name, bases, attrs, make=make, layered=True)
+
+class DeclarativeApp(BaseApp):
+    """
+        BaseApp for apps that declare their spec without any metaclass boilerplate
+
+        class App(DeclarativeApp):
+            class Components(Declaration):
+                db = Db
+
+        class Testing(App):
+            class Components:
+                db = FakeDb
+    """
+    __metaclass__ = AppSpecMeta
+    spec_handler = AppHandler
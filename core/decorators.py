@@ -1,8 +1,12 @@
 from functools import wraps
 from textwrap import dedent
+import threading
+import weakref
+import time
 
 from introspection import find_obj, position_for
-from errors import NotFound, RequirementError
+from counters import counters
+from errors import NotFound, RequirementError, DeveloperError
 
 def not_extendable(f):
     """Mark a function as not supporting __extend__"""
@@ -14,6 +18,22 @@ def not_nullable(f):
     f.__nullable__ = False
     return f
 
+def pure_checker(f):
+    """
+        Mark a checker as only depending on the app class and it's Attrs
+        So that an app's checker_cache can skip it once it has passed
+    """
+    f.__pure__ = True
+    return f
+
+def deferrable(f):
+    """
+        Mark a checker as safe to run after the app has started
+        So that apps with defer_checks run it in the background (see core.deferred)
+    """
+    f.__deferrable__ = True
+    return f
+
 class Uses(object):
     """
         Mark a function as requiring certain attributes on self
@@ -26,13 +46,210 @@ class Uses(object):
     def __call__(self, func):
         @wraps(func)
         def wrapped(app, *args, **kwargs):
-            objs = []
-            for path in self.paths:
-                try:
-                    nxt = find_obj(app, path)
-                except NotFound as error:
-                    raise RequirementError(origin=func, path=error.path, base=error.base, found=error.found)
-                objs.append(nxt)
+            objs = self.resolve(app, func)
             positional = list(objs) + list(args)
             return func(app, *positional, **kwargs)
+
+        # Record what we wrapped so the paths can be resolved ahead of time
+        wrapped.__uses_func__ = func
+        wrapped.__uses_paths__ = self.paths
         return wrapped
+
+    def resolve(self, app, func):
+        """Return the objects at our paths on the app"""
+        if counters.enabled:
+            counters.incr("uses.resolutions")
+
+        objs = []
+        for path in self.paths:
+            try:
+                nxt = find_obj(app, path)
+            except NotFound as error:
+                raise RequirementError(origin=func, path=error.path, base=error.base, found=error.found)
+            objs.append(nxt)
+        return objs
+
+class Memoized(Uses):
+    """
+        Like Uses, but remember what the function returns for each app
+
+        @Memoized("components.tables", maxsize=1000, ttl=60)
+        def lookup(self, tables, key):
+            return tables.find(key)
+
+        Results are kept for the arguments that aren't injected, which need to be hashable
+        The maxsize most recently used results are kept for each app,
+        for at most ttl seconds if ttl is given.
+
+        What's injected is found the first time the function is called for an app
+        So call lookup.invalidate(app) if any of it changes,
+        which forgets the results and finds what's injected again.
+
+        lookup.stats(app) says how many calls were hits and misses
+    """
+    def __init__(self, *paths, **kwargs):
+        self.ttl = kwargs.pop("ttl", None)
+        self.maxsize = kwargs.pop("maxsize", 128)
+        if kwargs:
+            raise DeveloperError("Unknown options for Memoized", options=sorted(kwargs))
+
+        super(Memoized, self).__init__(*paths)
+        self.lock = threading.Lock()
+
+        # {id(app): (weakref to app, cache)}
+        self.caches = {}
+
+    def __call__(self, func):
+        @wraps(func)
+        def wrapped(app, *args, **kwargs):
+            cache = self.cache_for(app)
+            objs = cache.objs
+            if objs is None:
+                objs = cache.objs = self.resolve(app, func)
+            return self.call(app, func, cache, objs, args, kwargs)
+
+        wrapped.__uses_func__ = func
+        wrapped.__uses_paths__ = self.paths
+        wrapped.__memoized__ = self
+
+        wrapped.stats = self.stats
+        wrapped.invalidate = self.invalidate
+        return wrapped
+
+    def bind(self, app, func, objs):
+        """Return func with app and what it uses already found, that still remembers results"""
+        cache = self.cache_for(app)
+        cache.objs = objs
+        def bound(*args, **kwargs):
+            return self.call(app, func, cache, objs, args, kwargs)
+        return bound
+
+    def call(self, app, func, cache, objs, args, kwargs):
+        """Return a remembered result or call the function and remember what it returns"""
+        key = args
+        if kwargs:
+            key = (args, frozenset(kwargs.items()))
+
+        try:
+            found, result = cache.get(key)
+        except TypeError:
+            # Unhashable arguments can't be remembered
+            return func(app, *(list(objs) + list(args)), **kwargs)
+
+        if counters.enabled:
+            counters.incr("uses.cache_hits" if found else "uses.cache_misses")
+
+        if not found:
+            result = func(app, *(list(objs) + list(args)), **kwargs)
+            cache.set(key, result)
+        return result
+
+    def cache_for(self, app):
+        """Return the cache for this app, making it if it doesn't exist yet"""
+        entry = self.caches.get(id(app))
+        if entry is not None and entry[0]() is app:
+            return entry[1]
+
+        with self.lock:
+            key = id(app)
+            entry = self.caches.get(key)
+            if entry is None or entry[0]() is not app:
+                # Forget the cache when the app goes away
+                forget = lambda ref: self.caches.pop(key, None)
+                entry = self.caches[key] = (weakref.ref(app, forget), MemoCache(self.maxsize, self.ttl))
+        return entry[1]
+
+    def existing(self, app):
+        """Return the cache for this app if it has one"""
+        entry = self.caches.get(id(app))
+        if entry is not None and entry[0]() is app:
+            return entry[1]
+
+    def invalidate(self, app):
+        """Forget the results for this app and find what's injected again next time"""
+        cache = self.existing(app)
+        if cache is not None:
+            cache.clear()
+
+    def stats(self, app):
+        """Return {hits, misses, size, maxsize} for this app"""
+        cache = self.existing(app)
+        if cache is None:
+            return dict(hits=0, misses=0, size=0, maxsize=self.maxsize)
+        return cache.stats()
+
+class MemoCache(object):
+    """
+        The results Memoized remembers for one app
+
+        Results are kept in a circular linked list of [previous, next, key, result, expires]
+        in the order they were used, so using and forgetting a result doesn't need to search
+    """
+    def __init__(self, maxsize, ttl):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        """Forget everything, including what was injected"""
+        with self.lock:
+            self.hits = 0
+            self.misses = 0
+            self.objs = None
+            self.results = {}
+            self.root = []
+            self.root[:] = [self.root, self.root, None, None, None]
+
+    def get(self, key):
+        """Return (found, result)"""
+        with self.lock:
+            link = self.results.get(key)
+            if link is not None and (link[4] is None or link[4] > time.time()):
+                self.promote(link)
+                self.hits += 1
+                return True, link[3]
+
+            self.misses += 1
+            return False, None
+
+    def set(self, key, result):
+        """Remember a result, forgetting the least recently used if we have too many"""
+        expires = None
+        if self.ttl is not None:
+            expires = time.time() + self.ttl
+
+        with self.lock:
+            link = self.results.get(key)
+            if link is not None:
+                link[3] = result
+                link[4] = expires
+                self.promote(link)
+                return
+
+            root = self.root
+            last = root[0]
+            link = [last, root, key, result, expires]
+            last[1] = root[0] = self.results[key] = link
+
+            if len(self.results) > self.maxsize:
+                oldest = root[1]
+                root[1] = oldest[1]
+                oldest[1][0] = root
+                del self.results[oldest[2]]
+
+    def promote(self, link):
+        """Move a link to the most recently used end, with the lock already held"""
+        previous, following = link[0], link[1]
+        previous[1] = following
+        following[0] = previous
+
+        root = self.root
+        last = root[0]
+        last[1] = root[0] = link
+        link[0] = last
+        link[1] = root
+
+    def stats(self):
+        """Return {hits, misses, size, maxsize}"""
+        return dict(hits=self.hits, misses=self.misses, size=len(self.results), maxsize=self.maxsize)
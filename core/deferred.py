@@ -0,0 +1,110 @@
+import collections
+import traceback
+import threading
+import logging
+import thread
+
+from errors import DeveloperError
+from recorder import recorder
+
+log = logging.getLogger("DeferredChecks")
+
+class DeferredChecks(object):
+    """
+        Run an app's deferrable checkers on a background thread once it has been installed
+
+        class App(BaseApp):
+            defer_checks = True
+            on_deferred_failure = "not_ready"
+
+            class Checkers:
+                @deferrable
+                def check_consistency(self):
+                    ...
+
+        Checkers that fail are always logged and then on_failure says what else happens:
+
+        log
+            Nothing else
+
+        not_ready
+            app.ready becomes False
+
+        stop
+            app.stop() is called if the app has one,
+            otherwise the main thread gets a KeyboardInterrupt
+
+        Or a callable that is given (app, attr, error)
+    """
+    actions = ("log", "not_ready", "stop")
+
+    def __init__(self, app, checkers, on_failure="log", cache=None):
+        if on_failure not in self.actions and not isinstance(on_failure, collections.Callable):
+            raise DeveloperError("Unknown action for deferred checks that fail", on_failure=on_failure, available=self.actions)
+
+        self.app = app
+        self.cache = cache
+        self.checkers = checkers
+        self.on_failure = on_failure
+
+        self.thread = None
+        self.failures = []
+        self.finished = threading.Event()
+
+    ########################
+    ###   USAGE
+    ########################
+
+    def start(self):
+        """Start checking in the background"""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="DeferredChecks")
+            self.thread.daemon = True
+            self.thread.start()
+        return self
+
+    def wait(self, timeout=None):
+        """Wait for the checks to finish and say whether they all passed"""
+        self.finished.wait(timeout)
+        return self.finished.is_set() and not self.failures
+
+    ########################
+    ###   CHECKING
+    ########################
+
+    def run(self):
+        """Call each checker, dealing with any that fail"""
+        digest = None
+        try:
+            for attr, checker in self.checkers:
+                if recorder.enabled:
+                    recorder.record("deferred_check", attr)
+                try:
+                    if self.cache is not None and getattr(checker, '__pure__', False):
+                        if digest is None:
+                            digest = self.cache.digest(self.app)
+                        self.cache.run(digest, self.app, attr, checker)
+                    else:
+                        checker()
+                except Exception as error:
+                    self.failures.append((attr, error, traceback.format_exc()))
+                    self.failed(attr, error)
+        finally:
+            self.finished.set()
+
+    def failed(self, attr, error):
+        """Log the failure and do our on_failure action"""
+        log.error("Deferred checker failed\tchecker=%s\terror=%s", attr, error)
+        if recorder.enabled:
+            recorder.record("deferred_check_failed", attr, error.__class__.__name__)
+
+        if self.on_failure == "not_ready":
+            self.app.ready = False
+        elif self.on_failure == "stop":
+            self.app.ready = False
+            if hasattr(self.app, 'stop'):
+                self.app.stop()
+            else:
+                thread.interrupt_main()
+        elif isinstance(self.on_failure, collections.Callable):
+            self.on_failure(self.app, attr, error)
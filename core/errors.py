@@ -1,6 +1,9 @@
 from textwrap import dedent
 import copy
 
+from recorder import recorder
+from counters import counters
+
 class NotFound(Exception):
     def __init__(self, *args, **kwargs):
         self.base = kwargs.get('base')
@@ -13,7 +16,16 @@ class DeveloperError(Exception):
     show_first = ['origin', 'added_by', 'removed_by']
 
     def __init__(self, *args, **kwargs):
+        if counters.enabled:
+            counters.incr("developer_errors")
         self.kwargs = kwargs
+
+        # What the framework was doing when this happened (see core.recorder)
+        # Only formatted if the message is made
+        self.events = None
+        if recorder.enabled and recorder.in_errors:
+            self.events = recorder.snapshot(recorder.in_errors)
+
         super(DeveloperError, self).__init__(*args)
 
     def __str__(self):
@@ -49,6 +61,15 @@ class DeveloperError(Exception):
                 message = "{}\n".format(message)
             message = "{}{}".format(message, self.extra_message(cleaned).lstrip())
 
+        events = None
+        if self.events is not None:
+            events = recorder.dump(recorder.in_errors, self.events)
+
+        if events:
+            if not message or message[-1] != '\n':
+                message = "{}\n".format(message)
+            message = "{}recent_events=\n{}".format(message, "\n".join("\t{}".format(line) for line in events.split("\n")))
+
         return message
 
     def clean_attrs(self, kwargs):
@@ -138,3 +159,9 @@ class RequirementAttributeError(RequirementError):
             """.format(**cleaned)
             )
         return msg, ['path_desc', 'path', 'obj', 'requires', 'found', 'identity']
+
+class FrozenError(DeveloperError):
+    desc = "Frozen apps can't be changed"
+
+class WorkerError(DeveloperError):
+    desc = "Failed in a worker process"
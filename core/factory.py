@@ -0,0 +1,108 @@
+import collections
+import threading
+import hashlib
+import types
+import sys
+
+from generator import declare_subclass
+from errors import DeveloperError
+from counters import counters
+from recorder import recorder
+
+class AppFactory(object):
+    """
+        Make app classes from plain data specs, remembering the last maxsize of them
+
+        factory = AppFactory(App)
+        kls = factory.make("Tenant", {"Components": {"db": Db}, "Attrs": {"tenant": 1}}, compile_bootstrap=True)
+
+        Takes the same arguments as core.generator.declare_subclass.
+        The spec is made canonical and hashed, so making a class for a spec
+        that has been seen before is a dictionary lookup rather than processing
+        the spec again, and the same class is returned each time.
+
+        Specs are made of dictionaries, lists, tuples, sets and scalars.
+        Classes and functions in a spec are identified by where they can be imported from
+        and by identity if they can't be, which is safe because the cached class keeps them alive.
+
+        The class returned is a plain subclass of the declared class,
+        as the bookkeepers of an app are found from the parents of the instance's class.
+    """
+    def __init__(self, base, maxsize=128):
+        self.base = base
+        self.maxsize = maxsize
+
+        self.lock = threading.Lock()
+        self.classes = collections.OrderedDict()
+
+    ########################
+    ###   USAGE
+    ########################
+
+    def make(self, name, declarations=None, **attrs):
+        """Return the app class for this spec, making it if we haven't seen it before"""
+        key = self.key_for(name, declarations, attrs)
+
+        with self.lock:
+            kls = self.classes.pop(key, None)
+            if kls is not None:
+                self.classes[key] = kls
+                if counters.enabled:
+                    counters.incr("factory.hits")
+                return kls
+
+        if counters.enabled:
+            counters.incr("factory.misses")
+        if recorder.enabled:
+            recorder.record("factory_make", name, key)
+
+        declared = declare_subclass(self.base, name, declarations, **attrs)
+        kls = type(declared.__name__, (declared, ), {'__module__': declared.__module__})
+
+        with self.lock:
+            # Another thread may have made it in the meantime, and we want everyone to get the same class
+            kls = self.classes.setdefault(key, kls)
+            while len(self.classes) > self.maxsize:
+                self.classes.popitem(last=False)
+        return kls
+
+    def forget(self):
+        """Forget every class we've made"""
+        with self.lock:
+            self.classes.clear()
+
+    ########################
+    ###   CANONICAL
+    ########################
+
+    def key_for(self, name, declarations, attrs):
+        """Return a hash of the canonical form of this spec"""
+        spec = (name, self.canonical(declarations or {}), self.canonical(attrs))
+        return hashlib.sha1(repr(spec)).hexdigest()
+
+    def canonical(self, val):
+        """Return a version of val that has the same repr for the same spec"""
+        if isinstance(val, dict):
+            return ("dict", sorted((self.canonical(k), self.canonical(v)) for k, v in val.items()))
+
+        if isinstance(val, (list, tuple)):
+            return (val.__class__.__name__, [self.canonical(v) for v in val])
+
+        if isinstance(val, (set, frozenset)):
+            return ("set", sorted(self.canonical(v) for v in val))
+
+        if val is None or isinstance(val, (basestring, bool, int, long, float)):
+            return val
+
+        if isinstance(val, (type, types.ClassType, types.FunctionType)):
+            return ("named", self.describe(val))
+
+        raise DeveloperError("Specs for an AppFactory can only hold plain data, classes and functions", found=val, kls=self.base)
+
+    def describe(self, thing):
+        """Return where thing can be imported from, or it's identity if it can't be"""
+        module = getattr(thing, '__module__', None)
+        name = getattr(thing, '__name__', None)
+        if name and module in sys.modules and getattr(sys.modules[module], name, None) is thing:
+            return "{}.{}".format(module, name)
+        return "id:{}".format(id(thing))
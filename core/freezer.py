@@ -0,0 +1,128 @@
+from functools import partial
+
+from errors import DeveloperError, FrozenError, NotFound, RequirementError
+from introspection import find_obj, bookkeepers_for
+
+class Frozen(object):
+    """Mixin for objects that can't be changed once they've been populated"""
+    __slots__ = ()
+
+    def __setattr__(self, attr, val):
+        raise FrozenError("Tried to set '{}'".format(attr), obj=self)
+
+    def __delattr__(self, attr):
+        raise FrozenError("Tried to delete '{}'".format(attr), obj=self)
+
+class FrozenApp(Frozen):
+    """Mixin for frozen apps"""
+    __slots__ = ()
+
+    def bootstrap(self, **options):
+        """Frozen apps have already been bootstrapped"""
+
+class Freezer(object):
+    """
+        Make a frozen copy of a bootstrapped app
+
+        The copy is an instance of a subclass of the app's class with a slot for each piece of state
+        Methods delegates become direct references to what they delegate to
+        @Uses methods get the objects they use bound in ahead of time
+        And the components become a frozen object that only has __slots__
+
+        The app classes themselves aren't slotted, so the copy still has a __dict__
+        It just stays empty because nothing can be set on the copy.
+        Freezing is about not being able to change the app, not about saving memory.
+    """
+    def __init__(self, app):
+        self.app = app
+        self.app_kls = app.__class__
+
+    def freeze(self):
+        """Return a frozen copy of the app"""
+        state = dict(vars(self.app))
+        if 'components' not in state:
+            raise DeveloperError("Only bootstrapped apps can be frozen", app=self.app)
+
+        state['components'] = self.freeze_components(state['components'])
+        for identity in self.delegates():
+            if identity not in state:
+                state[identity] = getattr(self.app, identity)
+
+        uses = self.uses_methods()
+        frozen_kls = self.frozen_kls(sorted(set(state) | set(uses)))
+        frozen = frozen_kls.__new__(frozen_kls)
+        for attr, val in state.items():
+            object.__setattr__(frozen, attr, val)
+
+        # Uses methods are resolved against the frozen app so they see frozen components
+        for attr, func in uses.items():
+            object.__setattr__(frozen, attr, self.bind_uses(frozen, func))
+
+        return frozen
+
+    ########################
+    ###   FINDERS
+    ########################
+
+    def delegates(self):
+        """Return identities of all the Methods delegates on the app"""
+        found = []
+        for methods, _ in bookkeepers_for(self.app_kls, 'methods'):
+            for identity in methods:
+                if identity not in found:
+                    found.append(identity)
+        return found
+
+    def uses_methods(self):
+        """Return {name: wrapped} for all the @Uses methods on the app"""
+        found = {}
+        for attr in dir(self.app_kls):
+            func = getattr(getattr(self.app_kls, attr, None), "im_func", None)
+            if func is not None and hasattr(func, "__uses_paths__"):
+                found[attr] = func
+        return found
+
+    ########################
+    ###   FREEZING
+    ########################
+
+    def bind_uses(self, frozen, wrapped):
+        """Return the function wrapped by @Uses with what it uses already passed in"""
+        objs = []
+        for path in wrapped.__uses_paths__:
+            try:
+                objs.append(find_obj(frozen, path))
+            except NotFound as error:
+                raise RequirementError(origin=wrapped.__uses_func__, path=error.path, base=error.base, found=error.found)
+
+        # Memoized methods keep remembering results for the frozen app
+        memoized = getattr(wrapped, '__memoized__', None)
+        if memoized is not None:
+            return memoized.bind(frozen, wrapped.__uses_func__, objs)
+        return partial(wrapped.__uses_func__, frozen, *objs)
+
+    def freeze_components(self, components):
+        """Return a frozen copy of the components object"""
+        names = sorted(key for key in vars(type(components)) if not key.startswith("_"))
+        frozen_kls = type("components", (Frozen, ), {'__slots__': names})
+        frozen = frozen_kls.__new__(frozen_kls)
+        for name in names:
+            object.__setattr__(frozen, name, getattr(components, name))
+        return frozen
+
+    def frozen_kls(self, names):
+        """
+            Return a subclass of the app class with slots for names
+
+            It still has a __dict__ from the app class, which the slots take precedence over
+        """
+        cache = self.app_kls.__dict__.get('__frozen_classes__')
+        if cache is None:
+            cache = {}
+            setattr(self.app_kls, '__frozen_classes__', cache)
+
+        key = tuple(names)
+        if key not in cache:
+            name = "Frozen{}".format(self.app_kls.__name__)
+            cache[key] = type(name, (FrozenApp, self.app_kls), {'__slots__': names, '__module__': self.app_kls.__module__})
+        return cache[key]
@@ -1,33 +1,177 @@
 from textwrap import dedent
+import threading
+import inspect
 import types
 
 from errors import DeveloperError, RequirementError
+from profiling import profiled, spec_profiler, hierarchy_depth
+from recorder import recorder
 from introspection import from_mro
-from bookkeeper import BookKeeper
+from bookkeeper import BookKeeper, Inherited
 
 class DelegateRequirementError(RequirementError):
     path_desc = "delegate_to"
 
-def parse_app_spec(handler):
+def parse_app_spec(handler, lazy=False):
     """
         Look at an app and update it's __bookkeeper__ attribute
         To reflect the specification of the app
         Combined with specification of app's super classes
         Based on handler specified
+
+        With lazy=True the class is made with just it's declarations
+        And they are processed the first time __bookkeeper__ is looked at (see LazySpec)
     """
     def parser(name, bases, attrs):
-        factory = handler(name, bases)
-        factory.update(attrs)
-        created = type(name, bases, attrs)
-        factory.post_creation(created, name, bases, attrs)
-        return created
+        if lazy and '__bookkeeper__' not in attrs:
+            return LazySpec.make(process, name, bases, attrs)
+        return process(name, bases, attrs)
+
+    def process(name, bases, attrs, created=None):
+        return process_spec(handler, name, bases, attrs, created=created)
     return parser
 
+def process_spec(handler, name, bases, attrs, created=None, make=type, layered=False):
+    """
+        Use handler to process the declarations in attrs and make the class with make
+        Or give the class in created what the declarations made if it already exists
+
+        With layered=True the handler builds on the parent's bookkeeper (see SpecHandler.layered)
+    """
+    if spec_profiler.enabled:
+        with spec_profiler.span(name, "class", depth=hierarchy_depth(bases), module=attrs.get('__module__')):
+            return create_from_spec(handler, name, bases, attrs, created, make, layered)
+    return create_from_spec(handler, name, bases, attrs, created, make, layered)
+
+def create_from_spec(handler, name, bases, attrs, created, make, layered=False):
+    """Used by process_spec to do the processing"""
+    factory = handler(name, bases)
+    if layered:
+        factory.layered = True
+    factory.update(attrs)
+    if created is None:
+        created = make(name, bases, attrs)
+    else:
+        # Lazy classes already exist, so give them what the declarations made
+        for key, val in attrs.items():
+            if created.__dict__.get(key, Unset) is not val:
+                setattr(created, key, val)
+    factory.post_creation(created, name, bases, attrs)
+    return created
+
+class Unset(object):
+    """Used to tell an unset attribute from one that is None"""
+
+class Declaration(object):
+    """
+        Base for declaration blocks written as new style classes
+
+        class Components(Declaration):
+            db = Db
+
+        Is the same as the old style
+
+        class Components:
+            db = Db
+    """
+
+class LazySpec(object):
+    """
+        Stands in for the __bookkeeper__ of a class made by parse_app_spec(handler, lazy=True)
+
+        The class only has it's raw declarations until the first time
+        __bookkeeper__ is looked at on it, a subclass or an instance.
+        BaseApp looks at it when it's instantiated.
+        The declarations are processed then, after those of the bases,
+        and this is replaced by the real bookkeeper.
+
+        Declarations keep being the origin of anything they made,
+        so errors point at the same place they would have without lazy.
+    """
+    # Only one class is processed at a time, though processing one processes it's bases
+    lock = threading.RLock()
+
+    def __init__(self, process, name, bases, attrs):
+        self.name = name
+        self.bases = bases
+        self.attrs = attrs
+        self.process = process
+
+        self.kls = None
+        self.resolving = False
+
+    @classmethod
+    def make(kls, process, name, bases, attrs):
+        """Make a class that has a LazySpec for it's __bookkeeper__"""
+        spec = kls(process, name, bases, dict(attrs))
+        attrs = dict(attrs)
+        attrs['__bookkeeper__'] = spec
+        spec.kls = type(name, bases, attrs)
+        return spec.kls
+
+    def __get__(self, instance, owner):
+        return self.resolve()
+
+    def resolve(self):
+        """Process the declarations if they haven't been and return the bookkeeper"""
+        with self.lock:
+            if self.kls.__dict__.get('__bookkeeper__') is self:
+                if self.resolving:
+                    raise DeveloperError("Spec needed while it was being processed", kls=self.kls)
+
+                self.resolving = True
+                try:
+                    # Process a copy so a failed attempt can be tried again
+                    self.process(self.name, self.bases, dict(self.attrs), created=self.kls)
+                finally:
+                    self.resolving = False
+
+                self.attrs = None
+                self.process = None
+            return self.kls.__dict__['__bookkeeper__']
+
+def metaclass_for(kls):
+    """Return the __metaclass__ a class was declared with"""
+    for base in inspect.getmro(kls):
+        if '__metaclass__' in base.__dict__:
+            return base.__dict__['__metaclass__']
+    return type(kls)
+
+def declare_subclass(kls, name, declarations=None, **attrs):
+    """
+        Make a subclass of kls with the __metaclass__ kls was declared with
+        declarations is {name: {key: val}} and each becomes a declaration block
+        So declare_subclass(App, "Testing", {"Components": {"db": FakeDb}})
+        is the same as writing out
+
+        class Testing(App):
+            __metaclass__ = parse_app_spec(AppHandler)
+            class Components:
+                db = FakeDb
+    """
+    metaclass = metaclass_for(kls)
+    body = dict(attrs)
+    body.setdefault('__module__', kls.__module__)
+    body['__metaclass__'] = metaclass
+    for declaration, values in (declarations or {}).items():
+        values = dict(values)
+        values.setdefault('__module__', body['__module__'])
+        body[declaration] = types.ClassType(declaration, (), values)
+    return metaclass(name, (kls, ), body)
+
 class SpecHandler(object):
     """
         Look at (name, bases, attrs) used to make a class
         and update attrs and attrs['__bookkeper__'] to reflect the semantics of the specification
     """
+    # {(handler class, prefix): {name: attr}} filled in by handler_names
+    handler_name_cache = {}
+
+    # Whether the bookkeeper starts with the parent's resolved layers (see BookKeeper share)
+    # So declarations that extend what's inherited are added on top of them
+    # Rather than finding and adding what's inherited from the bases' declarations again
+    layered = False
+
     def __init__(self, name, bases):
         self.name = name
         self.bases = bases
@@ -46,7 +190,7 @@ class SpecHandler(object):
 
         # Get the delarations in the attrs
         declaration_objs = self.find_declarations(attrs)
-        declarations = {key:vars(dec) for key, dec in declaration_objs.items()}
+        declarations = {key:self.spec_for(dec) for key, dec in declaration_objs.items()}
         declaration_name_map = {dec.lower():dec for dec in declarations}
 
         # Determine which declarations aren't known
@@ -54,12 +198,17 @@ class SpecHandler(object):
 
         # Understood declaration blocks
         for name, spec, handler in self.declarations_for_handlers(known_declarations, declarations, declaration_name_map):
+            if recorder.enabled:
+                recorder.record("declaration", self.name, name)
             self.handle_known(name, spec, handler, attrs)
 
         # Unknown declaration blocks
         for name, spec in sorted(special_declarations.items()):
+            if recorder.enabled:
+                recorder.record("custom_declaration", self.name, name)
             self.handle_unknown(name, spec, attrs)
 
+    @profiled("post_creation", lambda self, created, name, *args: name)
     def post_creation(self, created, name, bases, attrs):
         """Record any attributes this class manually replaced"""
         bookkeeper = created.__bookkeeper__
@@ -85,6 +234,7 @@ class SpecHandler(object):
     ###   HANDLERS
     ########################
 
+    @profiled("declaration", lambda self, name, *args: name)
     def handle_known(self, name, spec, handler, attrs):
         """
             Handle declaration with a handler
@@ -92,10 +242,14 @@ class SpecHandler(object):
         """
         nullable = self.is_nullable(handler)
         extendable = self.is_extendable(handler)
-        inherited = self.find_inherited(name, spec, attrs, extendable=extendable, nullable=nullable, force=True)
+        if self.layered and extendable and spec.get('__extend__', True) and '__nullify_inherited__' not in spec:
+            inherited = Inherited()
+        else:
+            inherited = self.find_inherited(name, spec, attrs, extendable=extendable, nullable=nullable, force=True)
         attributes = handler(name, spec, inherited, attrs)
         self.handle_attributes(name, attributes, inherited, attrs)
 
+    @profiled("custom", lambda self, name, *args: name)
     def handle_unknown(self, name, spec, attrs):
         """
             Handle unknown declarations
@@ -146,16 +300,27 @@ class SpecHandler(object):
 
     def find_handlers(self, prefix):
         """Return all the handlers on this class with provided prefix"""
-        known = {}
-        for attr in dir(self):
-            if attr.startswith(prefix):
-                name = attr[len(prefix):].lower()
-                handler = getattr(self, attr)
-                if name in known:
-                    raise DeveloperError("Declaration for {} specified twice".format(name))
-                known[name] = handler
-        return known
+        return {name:getattr(self, attr) for name, attr in self.handler_names(prefix).items()}
 
+    def handler_names(self, prefix):
+        """
+            Return {name: attr} for the handlers on this class with provided prefix
+            Handlers are methods, so these are only looked for once for each handler class
+        """
+        key = (self.__class__, prefix)
+        names = SpecHandler.handler_name_cache.get(key)
+        if names is None:
+            names = {}
+            for attr in dir(self):
+                if attr.startswith(prefix):
+                    name = attr[len(prefix):].lower()
+                    if name in names:
+                        raise DeveloperError("Declaration for {} specified twice".format(name))
+                    names[name] = attr
+            SpecHandler.handler_name_cache[key] = names
+        return names
+
+    @profiled("find_inherited", lambda self, name, *args, **kwargs: name)
     def find_inherited(self, name, attributes, attrs, extendable=True, nullable=True, force=False):
         """
             Find any inherited values from self.bases
@@ -182,7 +347,7 @@ class SpecHandler(object):
         if attributes.get('__extend__', True) or force:
             for base in self.reversed_bases:
                 if hasattr(base, name):
-                    inherited.update(vars(getattr(base, name)))
+                    inherited.update(self.spec_for(getattr(base, name)))
         return inherited
 
     ########################
@@ -190,8 +355,14 @@ class SpecHandler(object):
     ########################
 
     def is_declaration(self, obj):
-        """Says yes if the obj is an old style class"""
-        return isinstance(obj, types.ClassType)
+        """Says yes if the obj is an old style class or a Declaration"""
+        return isinstance(obj, types.ClassType) or (isinstance(obj, type) and issubclass(obj, Declaration) and obj is not Declaration)
+
+    def spec_for(self, declaration):
+        """Return the values in a declaration"""
+        if isinstance(declaration, types.ClassType):
+            return vars(declaration)
+        return dict(vars(declaration))
 
     def is_nullable(self, handler):
         """Determine if a handler says this declaration allows for __nullify_inherited__"""
@@ -260,7 +431,13 @@ class SpecHandler(object):
             if kls is None:
                 kls = BookKeeper
 
-            attrs['__bookkeeper__'] = BookKeeper(self.name)
+            parent = None
+            for base in self.bases:
+                parent = getattr(base, '__bookkeeper__', None)
+                if parent is not None:
+                    break
+
+            attrs['__bookkeeper__'] = BookKeeper(self.name, parent=parent, share=self.layered)
         return attrs['__bookkeeper__']
     
     # Alias for getting bookkeeper from attrs
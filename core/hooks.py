@@ -0,0 +1,69 @@
+from errors import DeveloperError, RequirementError, RequirementAttributeError
+
+class HookRequirementError(RequirementError):
+    path_desc = "hook"
+class HookRequirementAttributeError(RequirementAttributeError):
+    path_desc = "hook"
+
+def nothing(*args, **kwargs):
+    """Dispatcher for events without any hooks"""
+
+def dispatcher_for(hooks):
+    """
+        Return a callable that calls each of hooks in order
+        Which is the hook itself if there's only one
+    """
+    if not hooks:
+        return nothing
+
+    if len(hooks) == 1:
+        return hooks[0]
+
+    def dispatch(*args, **kwargs):
+        for hook in hooks:
+            hook(*args, **kwargs)
+    return dispatch
+
+class Hooks(object):
+    """
+        Dispatch for the events in an app's Hooks declarations
+
+        class Hooks:
+            before_request = ["components.db.begin", "components.metrics.before"]
+            after_request = "components.db.commit"
+
+        Each event's hooks are found once when the app is bootstrapped
+        And kept as a tuple in table, in the order they were declared
+        So firing an event is calling app.hooks.<event>(*args)
+        Which is a single loop over what was found
+
+        Events without hooks can be fired as well and do nothing
+    """
+    def __init__(self, table):
+        self._table = table
+        for event, hooks in table.items():
+            if event.startswith("_") or hasattr(Hooks, event):
+                raise DeveloperError("Hook event can't be called that", event=event)
+            setattr(self, event, dispatcher_for(hooks))
+
+    def __getattr__(self, event):
+        if event.startswith("_"):
+            raise AttributeError(event)
+
+        # Remember there's nothing so we only end up here once for each event
+        # Except on the no_hooks shared by every app without hooks, which would remember every event anyone fires
+        if self is not no_hooks:
+            setattr(self, event, nothing)
+        return nothing
+
+    @property
+    def table(self):
+        """{event: (hook, ...)} for the events that have hooks"""
+        return self._table
+
+    def fire(self, event, *args, **kwargs):
+        """Call the hooks for an event we only know the name of"""
+        getattr(self, event)(*args, **kwargs)
+
+# Hooks for apps that don't have any
+no_hooks = Hooks({})
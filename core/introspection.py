@@ -1,6 +1,7 @@
 import inspect
 import os
 
+from counters import counters
 from errors import NotFound
 
 def whereami():
@@ -59,17 +60,73 @@ def find_obj(base, path):
         where path is a dot seperated path to some attribute
         Raise NotFound if can't find the attribute
     """
+    if counters.enabled:
+        counters.incr("find_obj")
+
     obj = base
     found = []
     parts = path.split(".")
 
     for part in parts:
         if not hasattr(obj, part):
+            if counters.enabled:
+                counters.incr("find_obj.failed")
             raise NotFound(path=path, base=base, found=found)
         obj = getattr(obj, part)
         found.append(part)
     return obj
 
+class PathTrie(object):
+    """
+        Dot seperated paths merged into a tree of their parts
+        So that paths sharing a prefix only look up that prefix once
+    """
+    def __init__(self, paths=None):
+        self.root = {}
+        for path in paths or []:
+            self.add(path)
+
+    def add(self, path):
+        """Add a path to the tree"""
+        node = self.root
+        for part in path.split("."):
+            node = node.setdefault(part, {})
+        node[None] = path
+
+    def resolve(self, base):
+        """
+            Return {path: obj} for all the paths in the tree
+            Where obj is a NotFound instance for any path that can't be found
+            With the same path and found find_obj would have complained with
+        """
+        if counters.enabled:
+            counters.incr("path_trie.resolve")
+
+        resolved = {}
+        stack = [(self.root, base, [])]
+        while stack:
+            node, obj, found = stack.pop()
+            for part, child in node.items():
+                if part is None:
+                    resolved[child] = obj
+                elif hasattr(obj, part):
+                    stack.append((child, getattr(obj, part), found + [part]))
+                else:
+                    for path in self.paths_under(child):
+                        resolved[path] = NotFound(path=path, base=base, found=list(found))
+        return resolved
+
+    def paths_under(self, node):
+        """Yield all the paths in this part of the tree"""
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            for part, child in node.items():
+                if part is None:
+                    yield child
+                else:
+                    stack.append(child)
+
 def from_mro(base, key=None, not_self=False):
     """
         Look through mro for occurances of the key
@@ -93,6 +150,12 @@ def from_mro(base, key=None, not_self=False):
         except NotFound:
             pass
 
+def bookkeepers_for(base, key):
+    """Yield key from the base's own bookkeeper and then from those in the rest of the mro"""
+    yield getattr(base.__bookkeeper__, key), base
+    for info in iterate_bookkeepers(base, key):
+        yield info
+
 def iterate_bookkeepers(base, key=None):
     """Look through all bookkeepers of base provided"""
     find = "__bookkeeper__"
@@ -101,3 +164,27 @@ def iterate_bookkeepers(base, key=None):
 
     for info in from_mro(base, key=find):
         yield info
+
+def app_bookkeepers(base, key=None):
+    """
+        Yield the bookkeepers used to bootstrap instances of base, or key from each of them
+
+        That's those of base's parents (see iterate_bookkeepers)
+        Unless base's metaclass says bootstraps_own_bookkeeper (see core.declarative.AppSpecMeta)
+        In which case it's each class in the mro that has it's own bookkeeper, starting with base
+    """
+    if not getattr(type(base), 'bootstraps_own_bookkeeper', False):
+        for info in iterate_bookkeepers(base, key):
+            yield info
+        return
+
+    for kls in inspect.getmro(base):
+        if '__bookkeeper__' in kls.__dict__:
+            bookkeeper = kls.__bookkeeper__
+            if key:
+                try:
+                    yield find_obj(bookkeeper, key), kls
+                except NotFound:
+                    pass
+            else:
+                yield bookkeeper, kls
@@ -0,0 +1,165 @@
+import collections
+
+def interned(key):
+    """Return the interned version of a string key so every class shares the one copy"""
+    if type(key) is str:
+        return intern(key)
+    return key
+
+class Layer(collections.MutableMapping):
+    """
+        A dictionary that shares what it has in common with a parent mapping
+
+        Setting a key to the same object the parent has for that key
+        only remembers that the parent's key is visible rather than storing it again,
+        so a subclass that inherits most of it's spec only stores what it changes.
+        Keys the parent has that haven't been set here aren't visible.
+
+        Nothing is allocated until something is set,
+        and the parent is assumed not to change once it has children.
+        The length is remembered until the layer changes,
+        so asking a parent for it's length doesn't walk the whole chain each time
+    """
+    __slots__ = ('parent', 'local', 'visible', 'length')
+
+    # Value for visible that says every key in the parent is visible
+    everything = object()
+
+    def __init__(self, parent=None):
+        self.local = None
+        self.length = None
+        self.parent = parent
+        self.visible = None
+
+    ########################
+    ###   MAPPING
+    ########################
+
+    def __getitem__(self, key):
+        # Walk down layers that show everything rather than recursing into them
+        layer = self
+        while True:
+            local = layer.local
+            if local is not None and key in local:
+                return local[key]
+
+            visible = layer.visible
+            if visible is layer.everything:
+                layer = layer.parent
+            elif visible is not None and key in visible:
+                return layer.parent[key]
+            else:
+                raise KeyError(key)
+
+    def __setitem__(self, key, val):
+        self.length = None
+        parent = self.parent
+        if parent is not None and key in parent and parent[key] is val:
+            if self.local is not None:
+                self.local.pop(key, None)
+            self.show(key)
+        else:
+            if self.local is None:
+                self.local = {}
+            self.local[key] = val
+
+    def __delitem__(self, key):
+        self.length = None
+        found = False
+        if self.local is not None and key in self.local:
+            del self.local[key]
+            found = True
+
+        if self.shows(key):
+            self.hide(key)
+            found = True
+
+        if not found:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        layer = self
+        while True:
+            local = layer.local
+            if local is not None and key in local:
+                return True
+
+            visible = layer.visible
+            if visible is layer.everything:
+                layer = layer.parent
+            else:
+                return visible is not None and key in visible
+
+    def __iter__(self):
+        local = self.local or ()
+        for key in local:
+            yield key
+
+        visible = self.visible
+        if visible is self.everything:
+            visible = self.parent
+
+        if visible:
+            for key in visible:
+                if key not in local:
+                    yield key
+
+    def __len__(self):
+        if self.length is None:
+            self.length = sum(1 for _ in self)
+        return self.length
+
+    def __nonzero__(self):
+        if self.local:
+            return True
+
+        visible = self.visible
+        if visible is self.everything:
+            return bool(self.parent)
+        return bool(visible)
+
+    def __repr__(self):
+        return "<Layer {!r}>".format(dict(self.items()))
+
+    ########################
+    ###   VISIBILITY
+    ########################
+
+    def shows(self, key):
+        """Say whether this key from the parent is visible"""
+        visible = self.visible
+        if visible is None:
+            return False
+
+        if visible is self.everything:
+            return key in self.parent
+
+        return key in visible
+
+    def show(self, key):
+        """Make this key from the parent visible"""
+        visible = self.visible
+        if visible is self.everything:
+            return
+
+        self.length = None
+        if visible is None:
+            visible = self.visible = set()
+        visible.add(key)
+
+        # Forget the keys if it's all of them
+        if len(visible) == len(self.parent):
+            self.visible = self.everything
+
+    def show_everything(self):
+        """Make every key in the parent visible"""
+        if self.parent is not None:
+            self.length = None
+            self.visible = self.everything
+
+    def hide(self, key):
+        """Make this key from the parent not visible"""
+        self.length = None
+        if self.visible is self.everything:
+            self.visible = set(self.parent)
+        self.visible.discard(key)
@@ -0,0 +1,184 @@
+import multiprocessing
+import threading
+import time
+
+from generator import declare_subclass
+from errors import DeveloperError
+
+def percentile(ordered, percent):
+    """Return the value at this percentile of an already sorted list"""
+    if not ordered:
+        return None
+    index = int(round(percent / 100.0 * (len(ordered) - 1)))
+    return ordered[index]
+
+# The LoadTest running in processes mode
+# Worker processes get it by being forked, so the app class and args don't need to be picklable
+forked_load_test = None
+
+def run_in_process(indexes, start):
+    """Bootstrap an app in this process and make the requests it was given"""
+    app = forked_load_test.make_app()
+    return forked_load_test.drive(app, indexes, start)
+
+class LoadTest(object):
+    """
+        Drive a method on an app with concurrent requests and report latency
+
+        load = LoadTest(MyApp, "lookup", concurrency=8, requests=10000, rate=2000
+            , args = lambda app, index: (index % 100, )
+            , standins = {"Components": {"db": FakeDb}}
+            )
+        report = load.run()
+
+        mode is "threads" to share one app between threads
+        or "processes" to bootstrap an app in each process
+
+        If rate is given, requests are started at that many a second whether or not
+        earlier requests have finished, and latency is measured from when each request
+        should have started, so a slow app can't hide it's own queueing
+
+        standins are declarations used to make a subclass of the app class
+        So components can be replaced with local stand ins
+        The same way any subclass of the app would replace them
+
+        asyncio isn't available in Python2, so there is no asyncio mode
+    """
+    modes = ("threads", "processes")
+
+    def __init__(self, app_kls, method, concurrency=1, requests=1000, rate=None, mode="threads", args=None, standins=None):
+        if mode not in self.modes:
+            raise DeveloperError("Unknown load test mode", mode=mode, available=self.modes)
+
+        if standins:
+            app_kls = declare_subclass(app_kls, "{}WithStandins".format(app_kls.__name__), standins)
+
+        if args is None:
+            if method == "runner":
+                args = lambda app, index: (app, )
+            else:
+                args = lambda app, index: ()
+
+        self.args = args
+        self.mode = mode
+        self.rate = rate
+        self.method = method
+        self.app_kls = app_kls
+        self.requests = requests
+        self.concurrency = concurrency
+
+    ########################
+    ###   USAGE
+    ########################
+
+    def run(self):
+        """Make all the requests and return a report"""
+        if self.mode == "threads":
+            latencies, errors, elapsed = self.run_threads()
+        else:
+            latencies, errors, elapsed = self.run_processes()
+        return self.report(latencies, errors, elapsed)
+
+    def make_app(self):
+        """Make a bootstrapped app"""
+        # Bookkeepers are found from the parents of the instance's class
+        # So use a plain subclass to make sure our app class's declarations are used
+        app = type(self.app_kls.__name__, (self.app_kls, ), {'__module__': self.app_kls.__module__})()
+        app.bootstrap()
+        return app
+
+    ########################
+    ###   RUNNING
+    ########################
+
+    def run_threads(self):
+        """Run the requests from threads sharing one app"""
+        app = self.make_app()
+        results = [None] * self.concurrency
+        start = time.time()
+
+        def worker(number):
+            results[number] = self.drive(app, range(number, self.requests, self.concurrency), start)
+
+        threads = [threading.Thread(target=worker, args=(number, )) for number in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return self.combine(results, time.time() - start)
+
+    def run_processes(self):
+        """Run the requests from processes that each have their own app"""
+        global forked_load_test
+        forked_load_test = self
+        pool = multiprocessing.Pool(self.concurrency)
+        try:
+            # Give the processes a moment to bootstrap before the clock starts
+            start = time.time() + 0.5
+            pending = [
+                  pool.apply_async(run_in_process, (range(number, self.requests, self.concurrency), start))
+                  for number in range(self.concurrency)
+                ]
+            results = [result.get() for result in pending]
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
+            forked_load_test = None
+
+        return self.combine(results, time.time() - start)
+
+    def drive(self, app, indexes, start):
+        """Make the requests for these indexes, returning (latencies, errors)"""
+        func = getattr(app, self.method)
+        latencies = []
+        errors = 0
+        for index in indexes:
+            began = time.time()
+            if self.rate:
+                intended = start + index / float(self.rate)
+                if intended > began:
+                    time.sleep(intended - began)
+                began = intended
+            elif began < start:
+                time.sleep(start - began)
+                began = start
+
+            try:
+                func(*self.args(app, index))
+            except Exception:
+                errors += 1
+            latencies.append(time.time() - began)
+        return latencies, errors
+
+    ########################
+    ###   REPORTING
+    ########################
+
+    def combine(self, results, elapsed):
+        """Combine (latencies, errors) from each worker"""
+        latencies = []
+        errors = 0
+        for worker_latencies, worker_errors in results:
+            latencies.extend(worker_latencies)
+            errors += worker_errors
+        return latencies, errors, elapsed
+
+    def report(self, latencies, errors, elapsed):
+        """Return a dictionary describing how the requests went"""
+        latencies = sorted(latencies)
+        throughput = None
+        if elapsed > 0:
+            throughput = len(latencies) / elapsed
+
+        return dict(
+              requests = len(latencies)
+            , errors = errors
+            , elapsed = elapsed
+            , throughput = throughput
+            , p50 = percentile(latencies, 50)
+            , p99 = percentile(latencies, 99)
+            , p999 = percentile(latencies, 99.9)
+            , max = latencies[-1] if latencies else None
+            )
@@ -0,0 +1,164 @@
+import threading
+import logging
+import atexit
+import Queue
+import copy
+import sys
+
+# Only used to format tracebacks before they go on the queue
+exception_formatter = logging.Formatter()
+
+class QueueHandler(logging.Handler):
+    """
+        Logging handler that puts records onto a bounded queue
+        And leaves formatting and writing to a QueueWriter thread
+        Records that don't fit on the queue are dropped and counted
+    """
+    def __init__(self, queue, level=logging.NOTSET):
+        super(QueueHandler, self).__init__(level=level)
+        self.queue = queue
+        self.dropped = 0
+        self.dropped_lock = threading.Lock()
+
+    def emit(self, record):
+        """Put the record on the queue without blocking"""
+        try:
+            record = self.prepare(record)
+        except Exception:
+            self.handleError(record)
+            return
+
+        try:
+            self.queue.put_nowait(record)
+        except Queue.Full:
+            with self.dropped_lock:
+                self.dropped += 1
+
+    def prepare(self, record):
+        """
+            Return a copy of the record with the message and any traceback already formatted
+            So the writer doesn't see args or frames that have changed since the log call
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+class QueueWriter(object):
+    """
+        Dedicated thread that takes records off a queue
+        Formats them with the formatter it was given
+        And writes them to the stream in batches
+    """
+    stop_sentinel = object()
+
+    def __init__(self, queue, stream, formatter=None, batch_size=256):
+        self.queue = queue
+        self.stream = stream
+        self.formatter = formatter or logging.Formatter()
+        self.batch_size = batch_size
+
+        self.thread = None
+        self.stopped = False
+
+    def start(self):
+        """Start the writer thread if it isn't already running"""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="QueueWriter")
+            self.thread.daemon = True
+            self.thread.start()
+
+    def stop(self, timeout=None):
+        """Tell the writer to flush what it has and wait for it to finish"""
+        if self.thread is None or self.stopped:
+            return
+
+        # Block on the sentinel so it isn't dropped if the queue is full
+        self.stopped = True
+        self.queue.put(self.stop_sentinel)
+        self.thread.join(timeout)
+
+    def run(self):
+        """Wait for records and write them out until we see the stop sentinel"""
+        finished = False
+        while not finished:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except Queue.Empty:
+                    break
+
+            if self.stop_sentinel in batch:
+                finished = True
+                batch = [record for record in batch if record is not self.stop_sentinel]
+
+            self.write(batch)
+
+    def write(self, batch):
+        """Format and write a batch of records in one go"""
+        lines = []
+        for record in batch:
+            try:
+                lines.append(self.formatter.format(record))
+            except Exception:
+                lines.append("Failed to format log record\tmsg={!r}".format(record.msg))
+
+        if lines:
+            try:
+                self.stream.write("{}\n".format("\n".join(lines)))
+                self.stream.flush()
+            except Exception:
+                # Nowhere sensible to complain to
+                pass
+
+class AsyncLogging(object):
+    """
+        Component that moves log formatting and writing off the logging thread
+
+        Installing it replaces the handlers on the root logger with a QueueHandler
+        Records are formatted and written to the stream by a QueueWriter thread
+        And anything still on the queue is flushed when the process exits
+    """
+    def __init__(self, stream=None, fmt=None, level=logging.DEBUG, maxsize=10000, batch_size=256):
+        if stream is None:
+            stream = sys.stdout
+
+        if fmt is None:
+            fmt = "time=%(asctime)s\tcomponent=%(name)s\tmsg=%(message)s"
+
+        self.level = level
+        self.stream = stream
+        self.queue = Queue.Queue(maxsize=maxsize)
+        self.handler = QueueHandler(self.queue, level=level)
+        self.writer = QueueWriter(self.queue, stream, logging.Formatter(fmt), batch_size=batch_size)
+
+    @property
+    def dropped(self):
+        """Number of records dropped because the queue was full"""
+        return self.handler.dropped
+
+    def install(self, app=None):
+        """Put our handler on the root logger and start the writer"""
+        logger = logging.getLogger('')
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+
+        logger.addHandler(self.handler)
+        logger.setLevel(self.level)
+
+        self.writer.start()
+        atexit.register(self.shutdown)
+
+    def shutdown(self):
+        """Flush anything left on the queue and say how much we had to drop"""
+        self.writer.stop()
+        if self.dropped:
+            try:
+                self.stream.write("Dropped {} log records because the log queue was full\n".format(self.dropped))
+                self.stream.flush()
+            except Exception:
+                pass
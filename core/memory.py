@@ -0,0 +1,165 @@
+import types
+import sys
+
+try:
+    import tracemalloc
+except ImportError:
+    # Python2 needs the pytracemalloc backport for this
+    tracemalloc = None
+
+from errors import DeveloperError
+
+# Things that belong to the program rather than to an object made during bootstrap
+not_sized = (type, types.ClassType, types.ModuleType, types.FunctionType, types.MethodType
+    , types.BuiltinFunctionType, types.CodeType, types.FrameType, types.GeneratorType
+    )
+
+def deep_size(thing):
+    """
+        Return the bytes used by thing and everything it refers to
+        Leaving out classes, modules, functions and apps
+    """
+    size = 0
+    seen = set()
+    stack = [thing]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, not_sized) or hasattr(type(obj), '__bookkeeper__'):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj, 0)
+
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif isinstance(obj, basestring):
+            continue
+
+        if hasattr(obj, '__dict__') and isinstance(obj.__dict__, dict):
+            stack.append(obj.__dict__)
+        for slot in getattr(type(obj), '__slots__', ()):
+            if hasattr(obj, slot):
+                stack.append(getattr(obj, slot))
+    return size
+
+class NotMeasuring(object):
+    """Context manager for when there is nothing to measure with"""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, typ, value, tb):
+        pass
+
+    def made(self, thing):
+        pass
+not_measuring = NotMeasuring()
+
+def measuring(accountant, kind, name, thing=None):
+    """
+        Return a context manager that measures the block if we have an accountant
+        thing is an existing object the block adds to, and made() says what the block made
+    """
+    if accountant is None:
+        return not_measuring
+    return accountant.measure(kind, name, thing)
+
+class Measurement(object):
+    """Context manager that records the memory used by a block with an accountant"""
+    def __init__(self, accountant, kind, name, thing=None):
+        self.kind = kind
+        self.name = name
+        self.thing = thing
+        self.accountant = accountant
+
+    def __enter__(self):
+        self.before = self.accountant.current(self.thing)
+        return self
+
+    def __exit__(self, typ, value, tb):
+        allocated, peak = self.accountant.since(self.before, self.thing)
+        self.accountant.records.append((self.kind, self.name, allocated, peak))
+
+    def made(self, thing):
+        """Say what the block made, so it can be measured"""
+        self.thing = thing
+
+class MemoryAccountant(object):
+    """
+        Record how much memory is allocated by each thing made during bootstrap
+
+        Pass one into app.bootstrap(accountant=accountant)
+        And then look at accountant.report()
+
+        Uses tracemalloc when it's available, which is started while measuring
+        and stopped by stop() if it wasn't already tracing.
+
+        Without tracemalloc (Python2 without the pytracemalloc backport)
+        the size of each made object and everything it refers to is recorded instead,
+        and installers record how much their object grew. There is no peak then.
+    """
+    def __init__(self, use_tracemalloc=None):
+        if use_tracemalloc and tracemalloc is None:
+            raise DeveloperError("Memory accounting with tracemalloc needs the tracemalloc module, use use_tracemalloc=False for object sizes only")
+
+        self.records = []
+        self.started = False
+        self.tracing = tracemalloc is not None and use_tracemalloc is not False
+
+    def measure(self, kind, name, thing=None):
+        """Return a context manager that records memory used by the block against (kind, name)"""
+        return Measurement(self, kind, name, thing)
+
+    def stop(self):
+        """Stop tracemalloc if we were the ones that started it"""
+        if self.started:
+            self.started = False
+            tracemalloc.stop()
+
+    def current(self, thing=None):
+        """Return a marker for how much memory is used right now"""
+        if self.tracing:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.started = True
+
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+            return tracemalloc.get_traced_memory()
+
+        if thing is None:
+            return 0
+        return deep_size(thing)
+
+    def since(self, before, thing=None):
+        """Return (allocated, peak) bytes since the before marker"""
+        if self.tracing:
+            before_current, before_peak = before
+            current, peak = tracemalloc.get_traced_memory()
+            if not hasattr(tracemalloc, 'reset_peak') and peak <= before_peak:
+                # Without reset_peak the peak is for the whole trace,
+                # so we only know the peak of the block if it made a new one
+                peak = current
+            return current - before_current, max(peak - before_current, 0)
+
+        if thing is None:
+            return 0, None
+        return deep_size(thing) - before, None
+
+    def report(self, limit=None):
+        """Return a table of what was measured, biggest first"""
+        def size(record):
+            kind, name, allocated, peak = record
+            return allocated
+
+        records = sorted(self.records, key=size, reverse=True)
+        if limit is not None:
+            records = records[:limit]
+
+        lines = ["kind\tname\tallocated\tpeak"]
+        for kind, name, allocated, peak in records:
+            if peak is None:
+                peak = "?"
+            lines.append("{}\t{}\t{}\t{}".format(kind, name, allocated, peak))
+        return "\n".join(lines)
@@ -0,0 +1,257 @@
+import threading
+import weakref
+import socket
+import atexit
+import json
+import math
+import time
+
+class Histogram(object):
+    """
+        Fixed size histogram of positive values
+
+        Buckets are log linear, with sub_buckets buckets for each power of two
+        between 2**min_exp and 2**max_exp, so memory doesn't grow with the values
+        and percentiles are accurate to within 1/sub_buckets of the value
+    """
+    min_exp = -20
+    max_exp = 12
+    sub_buckets = 8
+    size = (max_exp - min_exp) * sub_buckets
+
+    def __init__(self):
+        self.counts = [0] * self.size
+        self.total = 0
+        self.count = 0
+
+    def record(self, value):
+        """Record a value"""
+        self.counts[self.index(value)] += 1
+        self.total += value
+        self.count += 1
+
+    def merge(self, other):
+        """Add the counts from another histogram to this one"""
+        for index, count in enumerate(list(other.counts)):
+            if count:
+                self.counts[index] += count
+        self.total += other.total
+        self.count += other.count
+
+    def percentile(self, percent):
+        """Return an estimate of the value at this percentile"""
+        if not self.count:
+            return None
+
+        wanted = self.count * percent / 100.0
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= wanted:
+                return self.value_for(index)
+        return self.value_for(self.size - 1)
+
+    def summary(self):
+        """Return a dictionary summarising the histogram"""
+        mean = None
+        if self.count:
+            mean = self.total / float(self.count)
+        return dict(count=self.count, mean=mean, p50=self.percentile(50), p99=self.percentile(99), p999=self.percentile(99.9))
+
+    @classmethod
+    def index(kls, value):
+        """Return the bucket for this value"""
+        if value <= 0:
+            return 0
+        mantissa, exponent = math.frexp(value)
+        index = (exponent - kls.min_exp) * kls.sub_buckets + int((mantissa - 0.5) * 2 * kls.sub_buckets)
+        return min(max(index, 0), kls.size - 1)
+
+    @classmethod
+    def value_for(kls, index):
+        """Return the upper bound of values in this bucket"""
+        exponent, sub = divmod(index, kls.sub_buckets)
+        mantissa = 0.5 + (sub + 1) / (2.0 * kls.sub_buckets)
+        return math.ldexp(mantissa, exponent + kls.min_exp)
+
+class ThreadBucket(object):
+    """What a single thread has recorded"""
+    def __init__(self):
+        self.gauges = {}
+        self.counters = {}
+        self.histograms = {}
+
+    def merge(self, other):
+        """Add what another bucket has recorded to this one"""
+        for name, value in other.counters.items():
+            self.counters[name] = self.counters.get(name, 0) + value
+
+        for name, (when, value) in other.gauges.items():
+            if name not in self.gauges or self.gauges[name][0] < when:
+                self.gauges[name] = (when, value)
+
+        for name, histogram in other.histograms.items():
+            if name not in self.histograms:
+                self.histograms[name] = Histogram()
+            self.histograms[name].merge(histogram)
+
+class ThreadMarker(object):
+    """Kept in a thread's local storage so we know when the thread has gone away"""
+
+class Metrics(object):
+    """
+        Component for counters, gauges and histograms
+
+        Each thread records into it's own bucket so recording never waits on a lock
+        Buckets are merged when the metrics are read,
+        and into one retired bucket when their thread finishes
+
+        If path or address (host, port) are given then the metrics are written
+        as a line of json to that file, or sent over udp to that address,
+        every interval seconds once the component is installed
+
+        class Components:
+            metrics = Metrics
+
+        @Uses("components.metrics")
+        def handle(self, metrics, request):
+            with metrics.timer("handle"):
+                ...
+    """
+    def __init__(self, path=None, address=None, interval=10, summarise=None):
+        self.path = path
+        self.address = address
+        self.interval = interval
+        self.summarise = summarise
+
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.thread = None
+
+        # {weakref to the ThreadMarker in the thread's local storage: bucket}
+        self.buckets = {}
+        self.retired = ThreadBucket()
+
+    ########################
+    ###   RECORDING
+    ########################
+
+    def incr(self, name, amount=1):
+        """Add to a counter"""
+        counters = self.bucket().counters
+        counters[name] = counters.get(name, 0) + amount
+
+    def gauge(self, name, value):
+        """Set a gauge, the latest value from any thread wins"""
+        self.bucket().gauges[name] = (time.time(), value)
+
+    def observe(self, name, value):
+        """Record a value in a histogram"""
+        histograms = self.bucket().histograms
+        histogram = histograms.get(name)
+        if histogram is None:
+            histogram = histograms[name] = Histogram()
+        histogram.record(value)
+
+    def timer(self, name):
+        """Return a context manager that records how long the block took in a histogram"""
+        return Timer(self, name)
+
+    def bucket(self):
+        """Return the bucket for this thread"""
+        bucket = getattr(self.local, 'bucket', None)
+        if bucket is None:
+            bucket = self.local.bucket = ThreadBucket()
+            marker = self.local.marker = ThreadMarker()
+            with self.lock:
+                self.buckets[weakref.ref(marker, self.retire)] = bucket
+        return bucket
+
+    def retire(self, ref):
+        """Merge the bucket of a thread that has finished into our retired bucket"""
+        with self.lock:
+            bucket = self.buckets.pop(ref, None)
+            if bucket is not None:
+                self.retired.merge(bucket)
+
+    ########################
+    ###   READING
+    ########################
+
+    def snapshot(self):
+        """Merge the buckets from every thread into {counters, gauges, histograms}"""
+        merged = ThreadBucket()
+        with self.lock:
+            buckets = list(self.buckets.values())
+            merged.merge(self.retired)
+
+        for bucket in buckets:
+            merged.merge(bucket)
+
+        return dict(
+              counters = merged.counters
+            , gauges = {name: value for name, (_, value) in merged.gauges.items()}
+            , histograms = {name: histogram.summary() for name, histogram in merged.histograms.items()}
+            )
+
+    def summary(self):
+        """
+            Return a short one line summary, for use in a process title
+            Showing the names in summarise, or all the counters and gauges
+        """
+        snapshot = self.snapshot()
+        values = dict(snapshot['counters'])
+        values.update(snapshot['gauges'])
+        for name, summary in snapshot['histograms'].items():
+            values[name] = summary['p99']
+
+        names = self.summarise
+        if names is None:
+            names = sorted(list(snapshot['counters']) + list(snapshot['gauges']))
+        return " ".join("{}={}".format(name, values[name]) for name in names if name in values)
+
+    ########################
+    ###   EXPORTING
+    ########################
+
+    def install(self, app):
+        """Start exporting if we have somewhere to export to"""
+        if self.thread is None and (self.path or self.address):
+            self.thread = threading.Thread(target=self.run, name="MetricsExporter")
+            self.thread.daemon = True
+            self.thread.start()
+            atexit.register(self.export)
+
+    def run(self):
+        """Export every interval"""
+        while True:
+            time.sleep(self.interval)
+            self.export()
+
+    def export(self):
+        """Write the current snapshot to our file and/or address"""
+        line = json.dumps(dict(self.snapshot(), time=time.time()))
+        if self.path:
+            with open(self.path, 'a') as fle:
+                fle.write("{}\n".format(line))
+
+        if self.address:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            try:
+                sock.sendto(line, tuple(self.address))
+            except socket.error:
+                pass
+            finally:
+                sock.close()
+
+class Timer(object):
+    """Context manager that records how long the block took in a histogram"""
+    def __init__(self, metrics, name):
+        self.name = name
+        self.metrics = metrics
+
+    def __enter__(self):
+        self.start = time.time()
+
+    def __exit__(self, typ, value, tb):
+        self.metrics.observe(self.name, time.time() - self.start)
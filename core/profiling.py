@@ -0,0 +1,105 @@
+from functools import wraps
+import threading
+import inspect
+import json
+import time
+import os
+
+class Span(object):
+    """Context manager that records how long a block took with a profiler"""
+    def __init__(self, profiler, name, category, args):
+        self.name = name
+        self.args = args
+        self.category = category
+        self.profiler = profiler
+
+    def __enter__(self):
+        self.start = time.time()
+
+    def __exit__(self, typ, value, tb):
+        self.profiler.record(self.name, self.category, self.start, time.time() - self.start, self.args)
+
+class SpecProfiler(object):
+    """
+        Record time spent creating app classes
+
+        Profiling is off until enable is called
+        Each app class, declaration block and bookkeeper update becomes a span
+        Which can be written out in the Chrome trace event format
+        And loaded into chrome://tracing or Perfetto
+    """
+    def __init__(self):
+        self.enabled = False
+        self.events = []
+
+    def enable(self):
+        """Start recording"""
+        self.enabled = True
+
+    def disable(self):
+        """Stop recording, but keep what has been recorded"""
+        self.enabled = False
+
+    def reset(self):
+        """Forget what has been recorded"""
+        self.events = []
+
+    def span(self, name, category, **args):
+        """Return a context manager that records the block as a span"""
+        return Span(self, name, category, args)
+
+    def record(self, name, category, start, duration, args):
+        """Record a span"""
+        self.events.append((name, category, start, duration, threading.current_thread().ident, args))
+
+    def totals(self, category=None):
+        """Return [(total seconds, category, name)] for recorded spans, slowest first"""
+        totals = {}
+        for name, cat, _, duration, _, _ in self.events:
+            if category is None or cat == category:
+                totals[(cat, name)] = totals.get((cat, name), 0) + duration
+        return sorted(((total, cat, name) for (cat, name), total in totals.items()), reverse=True)
+
+    def trace_events(self):
+        """Return what we recorded as Chrome trace events"""
+        pid = os.getpid()
+        events = []
+        for name, category, start, duration, tid, args in self.events:
+            events.append(
+                { "name": name, "cat": category, "ph": "X", "pid": pid, "tid": tid
+                , "ts": int(start * 1e6), "dur": int(duration * 1e6)
+                , "args": {key: str(val) for key, val in args.items()}
+                }
+            )
+        return events
+
+    def export_chrome_trace(self, path):
+        """Write recorded spans to path as a Chrome trace"""
+        with open(path, 'w') as fle:
+            json.dump({"traceEvents": self.trace_events()}, fle)
+
+def hierarchy_depth(bases):
+    """Return how deep a class with these bases is in its hierarchy"""
+    if not bases:
+        return 0
+    return max(len(inspect.getmro(base)) for base in bases)
+
+def profiled(category, label):
+    """
+        Decorate a method so that it's recorded as a span when the profiler is enabled
+        label is called with the method's arguments to get the name of the span
+        The instance must have a name attribute, which is recorded as the class
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapped(self, *args, **kwargs):
+            if not spec_profiler.enabled:
+                return func(self, *args, **kwargs)
+
+            with spec_profiler.span(label(self, *args, **kwargs), category, kls=self.name):
+                return func(self, *args, **kwargs)
+        return wrapped
+    return decorator
+
+# The profiler used for class creation
+spec_profiler = SpecProfiler()
@@ -0,0 +1,74 @@
+import itertools
+import time
+
+now = time.time
+
+class FlightRecorder(object):
+    """
+        Keeps the last size lifecycle events in a fixed size ring buffer
+
+        Recording is on from the start and is cheap enough to leave on,
+        so when something goes wrong there is a record of what led up to it
+        without having to run again with debug logging.
+
+        Events are a name and some details, which should be names rather than objects
+        so that recording doesn't keep anything alive.
+
+        The most recent events are added to the message of a DeveloperError (see core.errors)
+    """
+    def __init__(self, size=2048, in_errors=30):
+        self.size = size
+        self.enabled = True
+        self.in_errors = in_errors
+        self.reset()
+
+    def enable(self):
+        """Start recording"""
+        self.enabled = True
+
+    def disable(self):
+        """Stop recording, but keep what has been recorded so far"""
+        self.enabled = False
+
+    def reset(self):
+        """Forget everything that has been recorded"""
+        self.entries = [None] * self.size
+        self.latest = -1
+
+        # count is atomic, so threads can record without a lock
+        self.count = itertools.count().next
+
+    def record(self, event, *details):
+        """Record an event"""
+        index = self.count()
+        self.entries[index % self.size] = (index, now(), event, details)
+        self.latest = index
+
+    def snapshot(self, limit):
+        """
+            Return the last limit entries as they are now, for recent and dump to look at later
+            Without sorting or formatting anything, so it's cheap enough to take whenever something goes wrong
+        """
+        latest = self.latest
+        return [self.entries[index % self.size] for index in range(max(latest - limit + 1, 0), latest + 1)]
+
+    def recent(self, limit=None, snapshot=None):
+        """Return [(time, event, details)] for what has been recorded, or what's in snapshot, oldest first"""
+        if snapshot is None:
+            snapshot = list(self.entries)
+
+        entries = sorted(entry for entry in snapshot if entry is not None)
+        if limit is not None:
+            entries = entries[-limit:]
+        return [(when, event, details) for _, when, event, details in entries]
+
+    def dump(self, limit=None, snapshot=None):
+        """Return what has been recorded, or what's in snapshot, as lines of text, oldest first"""
+        lines = []
+        for when, event, details in self.recent(limit, snapshot):
+            stamp = "{}.{:06d}".format(time.strftime("%H:%M:%S", time.localtime(when)), int((when % 1) * 1000000))
+            lines.append("{} {} {}".format(stamp, event, " ".join(str(detail) for detail in details)).rstrip())
+        return "\n".join(lines)
+
+# The recorder used by the framework
+recorder = FlightRecorder()
@@ -0,0 +1,144 @@
+import threading
+import atexit
+import time
+import sys
+import os
+
+class SamplingProfiler(object):
+    """
+        Component that periodically samples the stacks of every thread
+
+        Samples are aggregated into collapsed stacks (the format flamegraph.pl reads)
+        Frames for methods on the app, it's components and other things created
+        for it are named after where they live on the app, i.e. components.db.get
+
+        Sampling takes no more than max_overhead of the time by sleeping longer
+        between samples when taking a sample is slow
+
+        class Components:
+            profiler = SamplingProfiler
+
+        class Install:
+            profiler = "components.profiler"
+    """
+    def __init__(self, interval=0.01, max_overhead=0.01, path=None, dump_at_exit=True, max_depth=100):
+        if path is None:
+            path = "profile.{}.collapsed".format(os.getpid())
+
+        self.path = path
+        self.interval = interval
+        self.max_depth = max_depth
+        self.max_overhead = max_overhead
+        self.dump_at_exit = dump_at_exit
+
+        self.labels = {}
+        self.stacks = {}
+        self.samples = 0
+        self.thread = None
+        self.running = False
+        self.lock = threading.Lock()
+
+    ########################
+    ###   USAGE
+    ########################
+
+    def install(self, app):
+        """Learn the names of things on the app and start sampling"""
+        self.label(app)
+        if self.dump_at_exit:
+            atexit.register(self.stop)
+        self.start()
+
+    def start(self):
+        """Start the sampling thread"""
+        if self.thread is None:
+            self.running = True
+            self.thread = threading.Thread(target=self.run, name="SamplingProfiler")
+            self.thread.daemon = True
+            self.thread.start()
+
+    def stop(self):
+        """Stop sampling and dump what we have if we were told to"""
+        if self.thread is not None:
+            self.running = False
+            self.thread.join()
+            self.thread = None
+            if self.dump_at_exit:
+                self.dump()
+
+    def dump(self, path=None):
+        """Write collapsed stacks to path (or our path), most sampled first"""
+        if path is None:
+            path = self.path
+
+        with self.lock:
+            stacks = sorted(self.stacks.items(), key=lambda item: item[1], reverse=True)
+
+        with open(path, 'w') as fle:
+            for stack, count in stacks:
+                fle.write("{} {}\n".format(stack, count))
+        return path
+
+    def reset(self):
+        """Forget what has been sampled"""
+        with self.lock:
+            self.stacks = {}
+            self.samples = 0
+
+    ########################
+    ###   SAMPLING
+    ########################
+
+    def label(self, app):
+        """Record names for the app and everything on it"""
+        found = [("app", app)]
+        for attr, val in vars(app).items():
+            if attr != "components" and not attr.startswith("_"):
+                found.append((attr, val))
+
+        components = getattr(app, "components", None)
+        for name in dir(components):
+            if not name.startswith("_"):
+                found.append(("components.{}".format(name), getattr(components, name)))
+
+        # Labels are by id, so keep what we label alive to stop ids being reused
+        for label, obj in found:
+            self.labels[id(obj)] = (label, obj)
+
+    def run(self):
+        """Take samples until we're stopped"""
+        me = threading.current_thread().ident
+        while self.running:
+            start = time.time()
+            self.sample(me)
+            took = time.time() - start
+            time.sleep(max(self.interval, took / self.max_overhead))
+
+    def sample(self, ignore=None):
+        """Add the current stack of each thread to our stacks"""
+        names = dict((thread.ident, thread.name) for thread in threading.enumerate())
+        collapsed = []
+        for ident, frame in sys._current_frames().items():
+            if ident == ignore:
+                continue
+
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                stack.append(self.frame_name(frame))
+                frame = frame.f_back
+            stack.append(names.get(ident, str(ident)))
+            collapsed.append(";".join(reversed(stack)))
+
+        with self.lock:
+            self.samples += 1
+            for stack in collapsed:
+                self.stacks[stack] = self.stacks.get(stack, 0) + 1
+
+    def frame_name(self, frame):
+        """Name a frame after what it's a method of if we know it, or where it lives otherwise"""
+        code = frame.f_code
+        if code.co_argcount and code.co_varnames[0] == "self":
+            found = self.labels.get(id(frame.f_locals.get("self")))
+            if found is not None:
+                return "{}.{}".format(found[0], code.co_name)
+        return "{}:{}".format(os.path.basename(code.co_filename), code.co_name)
@@ -0,0 +1,115 @@
+import collections
+import tempfile
+import atexit
+import json
+import mmap
+import os
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from errors import DeveloperError
+
+class Shared(object):
+    """
+        A read only Attrs value that lives in one memory mapped file shared by every process
+
+        class Attrs:
+            table = Shared(lambda: load_big_table())
+
+        The value is made the first time it's needed and written to a file in /dev/shm
+        (or the temp dir if that isn't available), and each process then attaches
+        a read only view of that file rather than having it's own copy.
+        Processes forked after that already have the view.
+
+        Give a path to share the file between processes that weren't forked from each other,
+        the first process to get to it writes it and the rest attach to what's there.
+
+        Values may be strings, which are shared as a read only buffer,
+        or numpy arrays, which are shared as read only arrays.
+
+        Files we make are removed when the process that made them exits
+    """
+    header_size = mmap.ALLOCATIONGRANULARITY
+
+    def __init__(self, value, path=None):
+        self.path = path
+        self.value = value
+
+        self.view = None
+        self.mapped = None
+        self.owner = None
+
+    ########################
+    ###   USAGE
+    ########################
+
+    def attach(self):
+        """Return a read only view of the value, making the file first if need be"""
+        if self.view is None:
+            if self.path is None or not os.path.exists(self.path):
+                self.materialise()
+            self.view = self.open()
+        return self.view
+
+    def cleanup(self):
+        """Remove the file if this process made it"""
+        if self.owner == os.getpid() and self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+    ########################
+    ###   UTILITY
+    ########################
+
+    def materialise(self):
+        """Write our value to our file"""
+        value = self.value
+        if isinstance(value, collections.Callable):
+            value = value()
+
+        if isinstance(value, str):
+            header = dict(kind="str")
+            data = value
+        elif numpy is not None and isinstance(value, numpy.ndarray):
+            header = dict(kind="ndarray", dtype=value.dtype.str, shape=list(value.shape))
+            data = numpy.ascontiguousarray(value).tostring()
+        else:
+            raise DeveloperError("Shared Attrs can only be strings or numpy arrays", got=type(value))
+
+        header = json.dumps(header)
+        if len(header) >= self.header_size:
+            raise DeveloperError("Header for Shared value is too big", header=header)
+
+        # Named files are written somewhere else first so nothing attaches to half a file
+        if self.path is None:
+            directory = "/dev/shm" if os.path.isdir("/dev/shm") else None
+            fd, self.path = tempfile.mkstemp(prefix="shared-attr-", dir=directory)
+            writing = self.path
+        else:
+            writing = "{}.{}.tmp".format(self.path, os.getpid())
+            fd = os.open(writing, os.O_CREAT | os.O_WRONLY | os.O_TRUNC, 0644)
+
+        with os.fdopen(fd, 'wb') as fle:
+            fle.write(header.ljust(self.header_size, "\0"))
+            fle.write(data)
+
+        if writing != self.path:
+            os.rename(writing, self.path)
+        self.owner = os.getpid()
+        atexit.register(self.cleanup)
+
+    def open(self):
+        """Memory map our file and return a read only view of what's in it"""
+        with open(self.path, 'rb') as fle:
+            header = json.loads(fle.read(self.header_size).rstrip("\0"))
+            self.mapped = mmap.mmap(fle.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if header["kind"] == "str":
+            return buffer(self.mapped, self.header_size)
+
+        if numpy is None:
+            raise DeveloperError("Need numpy to attach a shared numpy array", path=self.path)
+        view = numpy.frombuffer(self.mapped, dtype=numpy.dtype(header["dtype"]), offset=self.header_size)
+        return view.reshape(header["shape"])
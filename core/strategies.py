@@ -0,0 +1,243 @@
+import multiprocessing
+import collections
+import traceback
+import threading
+import Queue
+
+from errors import DeveloperError, WorkerError
+from introspection import find_obj
+
+# The app each worker process uses for ParallelMap
+worker_app = None
+
+# (error, traceback) if the worker's app couldn't be bootstrapped
+worker_failure = None
+
+def start_worker(app_kls):
+    """
+        Bootstrap the app a ParallelMap worker process will use
+
+        A failure is kept for call_in_worker to give back rather than raised,
+        because the pool replaces a worker whose initializer raises, forever
+    """
+    global worker_app, worker_failure
+    try:
+        worker_app = app_kls()
+        worker_app.bootstrap()
+    except Exception as error:
+        worker_failure = ("Failed to bootstrap worker: {}: {}".format(error.__class__.__name__, error), traceback.format_exc())
+
+def call_in_worker(task):
+    """
+        Call a method on the worker's app with an item
+        Returning (True, result) or (False, (error, item, traceback)) if it failed
+        Errors are turned into strings here so they don't need to be pickleable
+    """
+    method, item = task
+    if worker_failure is not None:
+        error, tb = worker_failure
+        return False, (error, repr(item)[:200], tb)
+
+    try:
+        return True, getattr(worker_app, method)(item)
+    except Exception as error:
+        return False, ("{}: {}".format(error.__class__.__name__, error), repr(item)[:200], traceback.format_exc())
+
+class ParallelMap(object):
+    """
+        Strategy that maps an app method over an iterable with a pool of processes
+
+        class Strategy:
+            __main__ = ParallelMap
+            method = "process"
+            source = "inputs"
+            sink = "collect"
+            chunksize = 100
+
+        Each worker creates and bootstraps it's own instance of the app class
+        The iterable is found at source, and called if it's callable
+        Each result is passed to sink if there is one
+        With ordered=False results are given as they complete rather than in order
+    """
+    def __init__(self, method, source, sink=None, processes=None, chunksize=1, ordered=True):
+        self.sink = sink
+        self.method = method
+        self.source = source
+        self.ordered = ordered
+        self.chunksize = chunksize
+        self.processes = processes
+
+    def runner(self, app):
+        """Map our method over our source and give results to our sink"""
+        items = find_obj(app, self.source)
+        if isinstance(items, collections.Callable):
+            items = items()
+
+        sink = None
+        if self.sink:
+            sink = find_obj(app, self.sink)
+
+        for result in self.map(app.__class__, items):
+            if sink is not None:
+                sink(result)
+
+    def map(self, app_kls, items):
+        """Yield results of calling our method on each item in worker processes"""
+        pool = multiprocessing.Pool(self.processes, initializer=start_worker, initargs=(app_kls, ))
+        try:
+            tasks = ((self.method, item) for item in items)
+            if self.ordered:
+                results = pool.imap(call_in_worker, tasks, self.chunksize)
+            else:
+                results = pool.imap_unordered(call_in_worker, tasks, self.chunksize)
+
+            for success, result in results:
+                if not success:
+                    error, item, tb = result
+                    raise WorkerError(error, method=self.method, item=item, app_kls=app_kls, traceback=tb)
+                yield result
+
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
+
+class PipelineStage(object):
+    """A stage in a Pipeline, calling func on items from inbox with concurrency workers"""
+    def __init__(self, name, func, concurrency, inbox, outbox):
+        self.name = name
+        self.func = func
+        self.inbox = inbox
+        self.outbox = outbox
+        self.concurrency = concurrency
+
+class Pipeline(object):
+    """
+        Strategy that streams items from a source through stages into a sink
+
+        class Strategy:
+            __main__ = Pipeline
+            source = "read_lines"
+            stages = [("parse", 4), ("components.db.store", 8)]
+            sink = "collect"
+            maxsize = 100
+
+        The source is found on the app and called to get an iterable if it's callable
+        Each stage is a path on the app to a callable and how many workers call it
+        A stage may return skip_item to drop the item from the pipeline
+        Stages are joined by queues holding at most maxsize items
+        So a slow stage holds back the stages before it rather than buffering everything
+
+        Python2 has no asyncio, so stages are run by threads
+    """
+    skip_item = object()
+    finished = object()
+
+    def __init__(self, source, stages, sink=None, maxsize=100):
+        self.sink = sink
+        self.source = source
+        self.stages = stages
+        self.maxsize = maxsize
+
+    def runner(self, app):
+        """Run the pipeline until the source is exhausted and everything has gone through"""
+        items = find_obj(app, self.source)
+        if isinstance(items, collections.Callable):
+            items = items()
+
+        stages = self.make_stages(app)
+        errors = []
+        threads = []
+        for stage in stages:
+            for _ in range(stage.concurrency):
+                threads.append(self.start(self.work, stage, errors))
+
+        sink = None
+        if self.sink:
+            sink = find_obj(app, self.sink)
+        drain = self.start(self.drain, stages[-1].outbox, sink, errors)
+
+        try:
+            for item in items:
+                if errors:
+                    break
+                stages[0].inbox.put(item)
+        finally:
+            self.finish(stages, drain)
+
+        if errors:
+            name, item, error, tb = errors[0]
+            raise WorkerError(error, stage=name, item=item, traceback=tb)
+
+    ########################
+    ###   UTILITY
+    ########################
+
+    def make_stages(self, app):
+        """Create the stages and the queues between them"""
+        stages = []
+        inbox = Queue.Queue(self.maxsize)
+        for stage in self.stages:
+            if isinstance(stage, basestring):
+                stage = (stage, 1)
+            path, concurrency = stage
+
+            outbox = Queue.Queue(self.maxsize)
+            stages.append(PipelineStage(path, find_obj(app, path), concurrency, inbox, outbox))
+            inbox = outbox
+
+        if not stages:
+            raise DeveloperError("A Pipeline needs at least one stage")
+        return stages
+
+    def start(self, target, *args):
+        """Start a daemon thread"""
+        thread = threading.Thread(target=target, args=args)
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def finish(self, stages, drain):
+        """Tell each stage in turn that there's nothing more coming and wait for them"""
+        for stage in stages:
+            for _ in range(stage.concurrency):
+                stage.inbox.put(self.finished)
+            stage.inbox.join()
+        stages[-1].outbox.put(self.finished)
+        drain.join()
+
+    def work(self, stage, errors):
+        """Call the stage's function on items until we're told to finish"""
+        while True:
+            item = stage.inbox.get()
+            try:
+                if item is self.finished:
+                    return
+
+                # Keep taking items after an error so nothing blocks on a full queue
+                if errors:
+                    continue
+
+                try:
+                    result = stage.func(item)
+                except Exception as error:
+                    errors.append((stage.name, repr(item)[:200], "{}: {}".format(error.__class__.__name__, error), traceback.format_exc()))
+                    continue
+
+                if result is not self.skip_item:
+                    stage.outbox.put(result)
+            finally:
+                stage.inbox.task_done()
+
+    def drain(self, outbox, sink, errors):
+        """Give results to the sink until we're told to finish"""
+        while True:
+            result = outbox.get()
+            if result is self.finished:
+                return
+
+            if sink is not None and not errors:
+                try:
+                    sink(result)
+                except Exception as error:
+                    errors.append((self.sink, repr(result)[:200], "{}: {}".format(error.__class__.__name__, error), traceback.format_exc()))
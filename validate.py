@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+"""
+    Validate every app class in some packages
+
+    ./validate.py plugins other.apps --processes 8
+
+    Each subclass of BaseApp defined in the packages is checked in a pool of processes
+    By processing it's spec, creating it's things, running all it's checkers
+    and making sure all it's installers can be installed, without installing them.
+
+    A line of json is printed for each class, and for each module that couldn't be imported
+    And the exit code is 1 if any of them failed
+"""
+import multiprocessing
+import traceback
+import argparse
+import inspect
+import pkgutil
+import json
+import time
+import sys
+
+from core.base import BaseApp
+
+def discover(packages):
+    """Return ([(module, name)] for app classes, [failure] for modules that couldn't be imported)"""
+    found = []
+    failures = []
+    for package in packages:
+        modules = [package]
+        try:
+            imported = __import__(package, fromlist=["__name__"])
+        except Exception as error:
+            failures.append(failure_for(dict(module=package), error))
+            continue
+
+        if hasattr(imported, '__path__'):
+            def onerror(name):
+                failures.append(failure_for(dict(module=name), sys.exc_info()[1]))
+            modules.extend(name for _, name, _ in pkgutil.walk_packages(imported.__path__, "{}.".format(package), onerror=onerror))
+
+        for module in modules:
+            try:
+                imported = __import__(module, fromlist=["__name__"])
+            except Exception as error:
+                failures.append(failure_for(dict(module=module), error))
+                continue
+
+            for name, kls in sorted(vars(imported).items()):
+                if inspect.isclass(kls) and issubclass(kls, BaseApp) and kls is not BaseApp and kls.__module__ == module:
+                    found.append((module, name))
+    return found, failures
+
+def validate(found):
+    """Validate one app class and return a result for it"""
+    module, name = found
+    result = dict(app="{}.{}".format(module, name))
+    start = time.time()
+    try:
+        kls = getattr(sys.modules[module], name)
+
+        # Bookkeepers are found from the parents of the instance's class
+        # So use a plain subclass to make sure the app class's declarations are used
+        app = type(kls.__name__, (kls, ), {'__module__': kls.__module__})()
+
+        admin = app.admin_kls(app)
+        admin.create_things()
+        admin.sanity_check()
+        for attr in admin.deferred:
+            getattr(app, attr)()
+        for key, installer, origin in admin.installers:
+            admin.find_installer(key, installer, origin)
+    except Exception as error:
+        result = failure_for(result, error)
+    else:
+        result["ok"] = True
+    result["seconds"] = round(time.time() - start, 6)
+    return result
+
+def failure_for(result, error):
+    """Add what went wrong to a result"""
+    result.update(ok=False, error=error.__class__.__name__, message=str(error), traceback=traceback.format_exc())
+    return result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate every app class in some packages")
+    parser.add_argument("packages", nargs="+", help="Packages to look for app classes in")
+    parser.add_argument("--processes", type=int, default=None, help="How many processes to validate with, defaults to the number of cpus")
+    args = parser.parse_args(argv)
+
+    found, failures = discover(args.packages)
+    for failure in failures:
+        print json.dumps(failure)
+
+    failed = len(failures)
+    if found:
+        pool = multiprocessing.Pool(args.processes)
+        try:
+            for result in pool.imap_unordered(validate, found):
+                if not result["ok"]:
+                    failed += 1
+                print json.dumps(result)
+                sys.stdout.flush()
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
+
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())